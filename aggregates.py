@@ -0,0 +1,113 @@
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+from cleaning import CHUNKSIZE, file_digest, iter_clean_listings
+from summary import combine_counts, count_rows, weighted_quantile
+
+logger = logging.getLogger(__name__)
+
+ROOM_CATEGORIES = ['1 Room', '2 Rooms', '3 Rooms', '4 Rooms', '5+ Rooms']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+CUBE_DIMENSIONS = ['city', 'region', 'property_type', 'room_category', 'year_month', 'weekday']
+
+# Areas outside this range are data entry noise rather than real properties
+AREA_RANGE = (0, 500)
+
+def categorize_rooms(rooms):
+    """Room counts as '1 Room' ... '5+ Rooms', 'Unknown' when missing, below one or fractional"""
+    rooms = rooms.to_numpy(dtype=float)
+    conditions = [rooms == 1, rooms == 2, rooms == 3, rooms == 4, rooms >= 5]
+    labels = np.select(conditions, ROOM_CATEGORIES, default='Unknown')
+    return pd.Categorical(labels, categories=ROOM_CATEGORIES + ['Unknown'])
+
+class ListingAggregates:
+    """Listing counts over city x region x property type x room category x month x weekday, plus area stats
+
+    Built with one pass over the clean listings; every chart reads its
+    counts from here instead of filtering the full DataFrame again.
+    """
+
+    def __init__(self, counts, area_stats, total):
+        self.counts = counts
+        self.area_stats = area_stats
+        self.total = total
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Aggregate clean listings arriving in chunks, combining the partial counts as they come
+
+        Area medians are exact: they are taken from per-type counts of each
+        distinct area rather than from the rows themselves.
+        """
+        low, high = AREA_RANGE
+        counts, areas, total = None, [], 0
+        for df in chunks:
+            dimensions = pd.DataFrame({
+                'city': df['city'].astype(object),
+                'region': df['region'].astype(object),
+                'property_type': df['property_type'].astype(object),
+                'room_category': categorize_rooms(df['rooms_clean']).astype(object),
+                'year_month': df['date_parsed'].dt.to_period('M'),
+                'weekday': df['date_parsed'].dt.weekday.astype('Int8'),
+            })
+            part = dimensions.groupby(CUBE_DIMENSIONS, dropna=False).size().rename('count').reset_index()
+            if counts is not None:
+                part = (pd.concat([counts, part], ignore_index=True)
+                        .groupby(CUBE_DIMENSIONS, dropna=False, as_index=False)['count'].sum())
+            counts = part
+            sized = df[(df['area_clean'] > low) & (df['area_clean'] < high)]
+            areas = [combine_counts(areas + [count_rows(sized, ('property_type', 'area_clean'))],
+                                    ('property_type', 'area_clean'))]
+            total += len(df)
+
+        area_stats = {}
+        for property_type, part in (areas[0].groupby('property_type') if areas else ()):
+            values, weights = part['area_clean'].to_numpy(dtype=float), part['count'].to_numpy()
+            area_stats[property_type] = {
+                'count': weights.sum(),
+                'mean': (values * weights).sum() / weights.sum(),
+                'median': weighted_quantile(values, weights, 0.5),
+            }
+        area_stats = pd.DataFrame.from_dict(area_stats, orient='index', columns=['count', 'mean', 'median'])
+        if counts is None:
+            counts = pd.DataFrame(columns=CUBE_DIMENSIONS + ['count'])
+        return cls(counts, area_stats.rename_axis('property_type'), total)
+
+    def count_by(self, *dimensions, **filters):
+        """Listing counts grouped by the given dimensions, for rows whose dimensions equal `filters`
+
+        Missing values of the grouped dimensions are left out, like value_counts.
+        """
+        counts = self.counts
+        for column, value in filters.items():
+            counts = counts[counts[column] == value]
+        return counts.groupby(list(dimensions), observed=True)['count'].sum()
+
+    def save(self, path, source_digest):
+        pd.to_pickle({'source_digest': source_digest, 'counts': self.counts,
+                      'area_stats': self.area_stats, 'total': self.total}, path)
+
+def load_aggregates(clean_path='binalar_listings_clean.csv', cache_path=None, chunksize=CHUNKSIZE):
+    """Aggregates of the clean CSV, reused from `cache_path` while the CSV is unchanged
+
+    The cache (default: <clean_path>.aggregates.pkl) is keyed by the CSV's
+    SHA-256, so the clean data is only read and grouped after it changed,
+    and then `chunksize` rows at a time.
+    """
+    cache_path = cache_path or f"{clean_path}.aggregates.pkl"
+    digest = file_digest(clean_path)
+    if os.path.exists(cache_path):
+        try:
+            cached = pd.read_pickle(cache_path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable aggregate cache {cache_path}: {e}")
+        else:
+            if cached.get('source_digest') == digest:
+                return ListingAggregates(cached['counts'], cached['area_stats'], cached['total'])
+
+    aggregates = ListingAggregates.from_chunks(iter_clean_listings(clean_path, chunksize))
+    aggregates.save(cache_path, digest)
+    return aggregates
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+
+import main
+from replay_server import create_app, start_server, synthetic_page
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(name, latencies, elapsed, **throughput):
+    """Result row: latency percentiles in ms, per-second rates for each counted item, peak RSS"""
+    result = {
+        'name': name,
+        'elapsed_s': round(elapsed, 4),
+        'calls': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4) if latencies else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 4) if latencies else None,
+    }
+    for unit, count in throughput.items():
+        result[unit] = count
+        result[f"{unit}_per_s"] = round(count / elapsed, 2) if elapsed else None
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+def bench_parse(backend, pages=50):
+    """parse_listings_from_page on synthetic fixture pages"""
+    fixtures = [synthetic_page(offset * 32) for offset in range(pages)]
+    parse = main.PARSER_BACKENDS[backend]
+    latencies = []
+    listings = 0
+    started = time.perf_counter()
+    for html in fixtures:
+        t = time.perf_counter()
+        listings += len(parse(html, 'https://binalar.az'))
+        latencies.append(time.perf_counter() - t)
+    return summarize(f"parse[{backend}]", latencies, time.perf_counter() - started,
+                     pages=pages, listings=listings)
+
+def bench_extract_id(calls=100000):
+    """extract_listing_id_from_url on typical listing paths"""
+    paths = [f"/4-otaqli-menzil-kohne-tikili-satilir-montin-nerimanov-{n}" for n in range(1000)]
+    batch = 1000
+    latencies = []
+    started = time.perf_counter()
+    for start in range(0, calls, batch):
+        t = time.perf_counter()
+        for path in paths[:batch]:
+            main.extract_listing_id_from_url(path)
+        latencies.append((time.perf_counter() - t) / batch)
+    return summarize('extract_listing_id_from_url', latencies, time.perf_counter() - started, ids=calls)
+
+async def bench_phone(lookups=500, concurrency=20, latency=0.01):
+    """fetch_phone_number against the local stand-in"""
+    runner, base_url = await start_server(create_app(latency=latency))
+    try:
+        async with main.BinalarScraper(base_url=base_url) as scraper:
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies = []
+
+            async def lookup(listing_id):
+                async with semaphore:
+                    t = time.perf_counter()
+                    await scraper.fetch_phone_number(listing_id)
+                    latencies.append(time.perf_counter() - t)
+
+            started = time.perf_counter()
+            await asyncio.gather(*[lookup(500000 - n) for n in range(lookups)])
+            elapsed = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+    return summarize(f"fetch_phone_number[c={concurrency}]", latencies, elapsed, lookups=lookups)
+
+async def bench_scrape(max_concurrent, pages=100, latency=0.02, parser_backend='lxml'):
+    """Full scrape_listings run against the stand-in"""
+    runner, base_url = await start_server(create_app(synthetic_pages=pages, latency=latency))
+    try:
+        scraper = main.BinalarScraper(max_concurrent=max_concurrent, delay=0, parser_backend=parser_backend,
+                                      phone_concurrency=max_concurrent, phone_rate=0, base_url=base_url)
+        async with scraper:
+            latencies = []
+            fetch_page = scraper.fetch_page
+
+            async def timed_fetch_page(url):
+                t = time.perf_counter()
+                content = await fetch_page(url)
+                latencies.append(time.perf_counter() - t)
+                return content
+
+            scraper.fetch_page = timed_fetch_page
+            started = time.perf_counter()
+            await scraper.scrape_listings(max_pages=pages)
+            elapsed = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+    return summarize(f"scrape_listings[c={max_concurrent}]", latencies, elapsed,
+                     pages=pages, listings=scraper.listings_count)
+
+def make_listings(rows):
+    """`rows` listings cloned from parsed synthetic pages with unique ids"""
+    template = main.parse_listings_from_page_lxml(synthetic_page(0), 'https://binalar.az')
+    for listing in template:
+        listing.phone = listing.visible_phone or '(050) 123-45-67'
+    return [replace(template[n % len(template)], id=n) for n in range(rows)]
+
+def bench_save(rows, formats=('csv', 'xlsx')):
+    """save_to_csv / save_to_xlsx at a given row count"""
+    scraper = main.BinalarScraper()
+    scraper.listings_data = make_listings(rows)
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt in formats:
+            path = os.path.join(tmpdir, f"bench.{fmt}")
+            t = time.perf_counter()
+            getattr(scraper, f"save_to_{fmt}")(path)
+            elapsed = time.perf_counter() - t
+            result = summarize(f"save_to_{fmt}[{rows}]", [elapsed], elapsed, rows=rows)
+            result['file_mb'] = round(os.path.getsize(path) / (1024 * 1024), 2)
+            results.append(result)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results, baseline=None):
+    """Print a table, with the change against a baseline run when given"""
+    previous = {row['name']: row for row in (baseline or {}).get('results', [])}
+    print(f"{'benchmark':34s} {'p50 ms':>10s} {'p99 ms':>10s} {'rate/s':>12s} {'rss MB':>8s} {'vs base':>8s}")
+    print('-' * 88)
+    for row in results:
+        rate_key = next((key for key in row if key.endswith('_per_s')), None)
+        rate = row.get(rate_key)
+        change = ''
+        base_rate = previous.get(row['name'], {}).get(rate_key)
+        if rate and base_rate:
+            change = f"{rate / base_rate:.2f}x"
+        p50 = f"{row['p50_ms']:.3f}" if row['p50_ms'] is not None else '-'
+        p99 = f"{row['p99_ms']:.3f}" if row['p99_ms'] is not None else '-'
+        rate_text = f"{rate:,.1f}" if rate else '-'
+        print(f"{row['name']:34s} {p50:>10s} {p99:>10s} {rate_text:>12s} {row['peak_rss_mb']:>8.1f} {change:>8s}")
+
+async def run(args):
+    results = []
+    selected = set(args.only.split(',')) if args.only else None
+
+    def wanted(name):
+        return selected is None or name in selected
+
+    if wanted('parse'):
+        for backend in sorted(main.PARSER_BACKENDS):
+            results.append(bench_parse(backend, pages=args.parse_pages))
+    if wanted('extract'):
+        results.append(bench_extract_id())
+    if wanted('phone'):
+        results.append(await bench_phone(lookups=args.phone_lookups, latency=args.latency))
+    if wanted('scrape'):
+        for concurrency in args.concurrency:
+            results.append(await bench_scrape(concurrency, pages=args.scrape_pages, latency=args.latency))
+    if wanted('save'):
+        for rows in args.rows:
+            # A sheet holds at most 1,048,576 rows, and even xlsxwriter's constant-memory
+            # mode takes far longer than the CSV writer at that size
+            formats = ('csv', 'xlsx') if rows <= args.max_xlsx_rows else ('csv',)
+            results.extend(bench_save(rows, formats))
+    return results
+
+def main_cli():
+    """Run the benchmarks and store results as JSON"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the scraper pipeline against a local stand-in server')
+    parser.add_argument('--only', type=str, default=None, help='Comma-separated subset of parse,extract,phone,scrape,save (default: all)')
+    parser.add_argument('--parse-pages', type=int, default=50, help='Fixture pages for the parse benchmark (default: 50)')
+    parser.add_argument('--phone-lookups', type=int, default=500, help='Phone lookups for the phone benchmark (default: 500)')
+    parser.add_argument('--scrape-pages', type=int, default=100, help='Pages per scrape_listings run (default: 100)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[5, 10, 20, 50], help='max_concurrent levels for scrape_listings (default: 5 10 20 50)')
+    parser.add_argument('--latency', type=float, default=0.02, help='Stand-in server latency in seconds (default: 0.02)')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help='Row counts for the save benchmarks (default: 10000 100000 1000000)')
+    parser.add_argument('--max-xlsx-rows', type=int, default=100000, help='Largest row count also written as XLSX (default: 100000)')
+    parser.add_argument('--output', type=str, default=None, help='JSON results file (default: bench_results/<commit>.json)')
+    parser.add_argument('--compare', type=str, default=None, help='Earlier JSON results file to compare rates against')
+
+    args = parser.parse_args()
+    # Per-page INFO logs would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = asyncio.run(run(args))
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join('bench_results', f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {output}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,96 @@
+import json
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CheckpointJournal:
+    """Append-only JSON-lines journal of parsed pages and finished phone lookups"""
+
+    def __init__(self, path, fsync_every=200, fsync_interval=5.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.file = None
+
+    def open(self, resume=False):
+        """Open the journal, keeping previous records when resuming and truncating otherwise"""
+        if resume:
+            self._drop_partial_line()
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _drop_partial_line(self, block_size=1 << 16):
+        """Cut a line left half written by a crash, so the next record starts on a line of its own"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - block_size)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                logger.warning(f"Dropping {end - position} bytes of a partial last line from {self.path}")
+                f.truncate(position)
+
+    def load(self):
+        """Replay the journal into (finished page URLs, parsed listings by page, phones by listing id)"""
+        done_pages = set()
+        pages = []
+        phones = {}
+        if not os.path.exists(self.path):
+            return done_pages, pages, phones
+
+        with open(self.path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash can leave the last line half written
+                    logger.warning(f"Ignoring unreadable checkpoint line {line_number}")
+                    continue
+                if record.get('type') == 'page':
+                    done_pages.add(record['url'])
+                    pages.append(record['listings'])
+                elif record.get('type') == 'phone':
+                    phones[record['id']] = record['phone']
+
+        logger.info(f"Checkpoint {self.path}: {len(done_pages)} pages and {len(phones)} finished listings")
+        return done_pages, pages, phones
+
+    def record_page(self, url, listings):
+        """Record a parsed page together with the listings it produced"""
+        self._write({'type': 'page', 'url': url, 'listings': listings})
+
+    def record_phone(self, listing_id, phone):
+        """Record that a listing finished the phone stage"""
+        self._write({'type': 'phone', 'id': listing_id, 'phone': phone})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.pending += 1
+        if self.pending >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records through to disk"""
+        if self.file and self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+            self.last_sync = time.monotonic()
+
+    def close(self):
+        """Flush and close the journal"""
+        if self.file:
+            self.flush()
+            self.file.close()
+            self.file = None
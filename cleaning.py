@@ -0,0 +1,278 @@
+import hashlib
+import logging
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from listing import DATE_FORMAT, split_title
+
+logger = logging.getLogger(__name__)
+
+TITLE_COLUMNS = ['city', 'region', 'property_type']
+DERIVED_COLUMNS = TITLE_COLUMNS + ['price_clean', 'rooms_clean', 'area_clean', 'price_per_sqm',
+                                   'date_parsed', 'year_month', 'month', 'year']
+
+# Rows per chunk when streaming CSVs, which bounds peak memory
+CHUNKSIZE = 200_000
+
+# Compact dtypes for reading the clean CSV. Raw scraper fields stay text;
+# price keeps float64 so prices above float32's 2**24 stay exact.
+RAW_TEXT_COLUMNS = ['phone', 'title', 'price', 'price_raw', 'rooms', 'area', 'floor',
+                    'description', 'date', 'address', 'visible_phone', 'phone_id', 'url']
+CLEAN_DTYPES = {
+    **{column: str for column in RAW_TEXT_COLUMNS},
+    **{column: 'category' for column in TITLE_COLUMNS},
+    'id': 'int64',
+    'price_clean': 'float64',
+    'rooms_clean': 'float32',
+    'area_clean': 'float32',
+    'price_per_sqm': 'float32',
+    'month': 'float32',
+    'year': 'float32',
+}
+
+def split_title_columns(titles):
+    """Split 'City / Region / Property type' titles into categorical city/region/property_type columns
+
+    Titles repeat heavily, so only the distinct ones are split (with the same
+    rules as the scraper's split_title) and the results are mapped back to
+    every row through category codes.
+    """
+    title_codes, unique_titles = pd.factorize(titles)
+    parts = [split_title(title) for title in unique_titles]
+    columns = {}
+    for position, column in enumerate(TITLE_COLUMNS):
+        part_codes, categories = pd.factorize(pd.Series([part[position] for part in parts], dtype=object))
+        # Missing titles (code -1) stay missing
+        codes = np.where(title_codes >= 0, part_codes[title_codes] if len(part_codes) else -1, -1)
+        columns[column] = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.DataFrame(columns, index=titles.index)
+
+def clean_listings(df):
+    """Add the derived columns the explore and chart scripts work with, without per-row Python
+
+    Adds city/region/property_type (categorical), price_clean, rooms_clean,
+    area_clean, price_per_sqm, date_parsed, year_month, month and year.
+    Returns the same DataFrame.
+    """
+    titles = split_title_columns(df['title'])
+    for column in TITLE_COLUMNS:
+        df[column] = titles[column]
+
+    df['price_clean'] = pd.to_numeric(df['price'], errors='coerce')
+    df['rooms_clean'] = pd.to_numeric(df['rooms'], errors='coerce')
+    df['area_clean'] = pd.to_numeric(df['area'], errors='coerce')
+    df['price_per_sqm'] = df['price_clean'] / df['area_clean']
+
+    df['date_parsed'] = pd.to_datetime(df['date'], format='%d.%m.%Y', errors='coerce')
+    df['year_month'] = df['date_parsed'].dt.to_period('M')
+    df['month'] = df['date_parsed'].dt.month
+    df['year'] = df['date_parsed'].dt.year
+    return df
+
+def _type_clean_chunk(df):
+    df['date_parsed'] = pd.to_datetime(df['date_parsed'], format='ISO8601', errors='coerce')
+    df['year_month'] = df['date_parsed'].dt.to_period('M')
+    return df
+
+def iter_clean_listings(path='binalar_listings_clean.csv', chunksize=CHUNKSIZE):
+    """Stream the clean CSV as typed DataFrames of at most `chunksize` rows"""
+    with pd.read_csv(path, dtype=CLEAN_DTYPES, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _type_clean_chunk(chunk)
+
+def iter_store_listings(store_path, chunksize=CHUNKSIZE):
+    """Stream the listings a ListingStore has not marked as removed, cleaned like the CSV, `chunksize` rows at a time"""
+    from listing_store import listing_columns, read_listings
+
+    has_date_raw = 'date_raw' in listing_columns(store_path)
+    columns = ', '.join(['id'] + RAW_TEXT_COLUMNS + (['date_raw'] if has_date_raw else []))
+    for chunk in read_listings(store_path, columns=columns, where='removed_at IS NULL', chunksize=chunksize):
+        # The store keeps ISO dates; the cleaning rules expect the site's format,
+        # and unparsed dates go back to the text the CSV would hold
+        chunk['date'] = chunk['date'].dt.strftime(DATE_FORMAT)
+        if has_date_raw:
+            chunk['date'] = chunk['date'].fillna(chunk.pop('date_raw'))
+        chunk = clean_listings(chunk)
+        yield chunk.astype({column: dtype for column, dtype in CLEAN_DTYPES.items()
+                            if column in DERIVED_COLUMNS and dtype != 'category'})
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class CleanState:
+    """SQLite record of the raw files and listing rows already materialized in the clean CSV"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, digest TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS rows ('
+            'listing_id INTEGER PRIMARY KEY, source TEXT NOT NULL, row_hash INTEGER NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);'
+        )
+        self.conn.commit()
+
+    def source_digest(self, source):
+        """Digest of a raw file when it was last processed, or None"""
+        row = self.conn.execute('SELECT digest FROM sources WHERE path = ?', (source,)).fetchone()
+        return row[0] if row else None
+
+    def clean_size(self):
+        """Size of the clean CSV after the last update, or None"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'clean_size'").fetchone()
+        return int(row[0]) if row else None
+
+    def rows(self):
+        """DataFrame of source and row_hash indexed by listing id"""
+        return pd.read_sql_query('SELECT listing_id, source, row_hash FROM rows', self.conn,
+                                 index_col='listing_id')
+
+    def record(self, source, digest, ids, row_hashes, removed_ids, clean_size):
+        """Store the rows written from a raw file and the clean CSV size in one transaction"""
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO rows (listing_id, source, row_hash) VALUES (?, ?, ?)',
+                ((int(listing_id), source, int(row_hash)) for listing_id, row_hash in zip(ids, row_hashes))
+            )
+            self.conn.executemany('DELETE FROM rows WHERE listing_id = ?',
+                                  ((int(listing_id),) for listing_id in removed_ids))
+            self.conn.execute('INSERT OR REPLACE INTO sources (path, digest) VALUES (?, ?)', (source, digest))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('clean_size', ?)",
+                              (str(clean_size),))
+
+    def reset(self):
+        """Forget everything, so the next update rebuilds the clean CSV"""
+        with self.conn:
+            self.conn.execute('DELETE FROM sources')
+            self.conn.execute('DELETE FROM rows')
+            self.conn.execute('DELETE FROM meta')
+
+    def close(self):
+        self.conn.close()
+
+def _append_csv(df, path):
+    """Append rows to a CSV, writing the header when the file is new or empty"""
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    df.to_csv(path, mode='w' if new_file else 'a', header=new_file, index=False)
+
+def _copy_csv(src_path, dest_path, chunksize, drop_ids=None, columns=None):
+    """Stream the rows of one CSV onto the end of another, leaving out `drop_ids`"""
+    with pd.read_csv(src_path, dtype=str, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if drop_ids is not None and len(drop_ids):
+                chunk = chunk[~np.isin(pd.to_numeric(chunk['id']).to_numpy(), drop_ids)]
+            if columns is not None:
+                chunk = chunk.reindex(columns=columns)
+            _append_csv(chunk, dest_path)
+
+def update_clean_listings(raw_paths='binalar_listings.csv', clean_path='binalar_listings_clean.csv',
+                          state_path=None, chunksize=CHUNKSIZE):
+    """Bring clean_path up to date with the raw scraper CSVs, cleaning only new or changed listings
+
+    Raw files whose contents are unchanged since the last run are not read.
+    Otherwise each row is hashed and compared with the hash stored for its
+    listing id: new listings are cleaned and appended, and the clean CSV is
+    only rewritten when listings changed or disappeared from their file.
+    The state lives in `state_path` (default: <clean_path>.state.sqlite);
+    if the clean CSV was modified behind its back it is rebuilt.
+
+    Raw files and the clean CSV are streamed `chunksize` rows at a time;
+    beyond that only listing ids and row hashes are held in memory.
+
+    Returns counts of added, updated, removed and unchanged listings and of
+    skipped files.
+    """
+    if isinstance(raw_paths, str):
+        raw_paths = [raw_paths]
+    counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'skipped_files': 0}
+    delta_path = f"{clean_path}.delta"
+    tmp_path = f"{clean_path}.tmp"
+
+    state = CleanState(state_path or f"{clean_path}.state.sqlite")
+    try:
+        clean_size = os.path.getsize(clean_path) if os.path.exists(clean_path) else None
+        rebuild = clean_size is None or clean_size != state.clean_size()
+        if rebuild:
+            logger.info(f"Rebuilding {clean_path} from scratch")
+            state.reset()
+
+        for source in raw_paths:
+            digest = file_digest(source)
+            if digest == state.source_digest(source):
+                counts['skipped_files'] += 1
+                continue
+
+            known = state.rows()
+            known_ids = known.index.to_numpy()
+            seen_ids = np.empty(0, dtype='int64')
+            delta_ids, delta_hashes, changed_ids = [], [], []
+            if os.path.exists(delta_path):
+                os.remove(delta_path)
+
+            # Read as text so row hashes do not depend on inferred dtypes
+            with pd.read_csv(source, dtype=str, chunksize=chunksize) as reader:
+                for raw in reader:
+                    raw['id'] = pd.to_numeric(raw['id'], errors='coerce')
+                    # Merged scraper output keeps the newest copy of a listing first
+                    raw = raw.dropna(subset=['id']).drop_duplicates('id', keep='first')
+                    raw['id'] = raw['id'].astype('int64')
+                    raw = raw[~np.isin(raw['id'].to_numpy(), seen_ids)].reset_index(drop=True)
+                    ids = raw['id'].to_numpy()
+                    seen_ids = np.union1d(seen_ids, ids)
+                    row_hashes = pd.util.hash_pandas_object(raw, index=False).to_numpy().view('int64')
+
+                    is_new = ~np.isin(ids, known_ids)
+                    is_changed = np.zeros(len(raw), dtype=bool)
+                    is_changed[~is_new] = known['row_hash'].reindex(ids[~is_new]).to_numpy() != row_hashes[~is_new]
+                    delta_mask = is_new | is_changed
+
+                    if delta_mask.any():
+                        _append_csv(clean_listings(raw[delta_mask].copy()), delta_path)
+                    delta_ids.append(ids[delta_mask])
+                    delta_hashes.append(row_hashes[delta_mask])
+                    changed_ids.append(ids[is_changed])
+                    counts['added'] += int(is_new.sum())
+                    counts['updated'] += int(is_changed.sum())
+                    counts['unchanged'] += int(len(raw) - delta_mask.sum())
+
+            removed_ids = known.index[(known['source'] == source) & ~known.index.isin(seen_ids)]
+            stale_ids = np.concatenate(changed_ids + [removed_ids.to_numpy()])
+            counts['removed'] += len(removed_ids)
+            has_delta = os.path.exists(delta_path)
+
+            if rebuild:
+                if has_delta:
+                    os.replace(delta_path, clean_path)
+                else:
+                    open(clean_path, 'w').close()
+                rebuild = False
+            elif len(stale_ids):
+                if has_delta:
+                    os.replace(delta_path, tmp_path)
+                elif os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                header = pd.read_csv(tmp_path, nrows=0).columns if has_delta else None
+                _copy_csv(clean_path, tmp_path, chunksize, drop_ids=stale_ids, columns=header)
+                os.replace(tmp_path, clean_path)
+            elif has_delta:
+                header = pd.read_csv(clean_path, nrows=0).columns if os.path.getsize(clean_path) else None
+                _copy_csv(delta_path, clean_path, chunksize, columns=header)
+                os.remove(delta_path)
+
+            delta_ids = np.concatenate(delta_ids or [seen_ids])
+            state.record(source, digest, delta_ids, np.concatenate(delta_hashes or [seen_ids]),
+                         removed_ids, os.path.getsize(clean_path))
+            logger.info(f"{source}: {len(delta_ids) - len(stale_ids) + len(removed_ids)} new, "
+                        f"{len(stale_ids) - len(removed_ids)} changed, {len(removed_ids)} removed listings")
+    finally:
+        state.close()
+    return counts
@@ -0,0 +1 @@
+# Lets pytest import the top-level scraper modules from tests/
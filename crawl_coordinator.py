@@ -0,0 +1,347 @@
+import asyncio
+import csv
+import glob
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from listing import Listing, to_int
+from main import BinalarScraper
+from sinks import CsvSink, MultiSink, XlsxSink
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    first_page INTEGER NOT NULL,
+    pages INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    listings INTEGER,
+    output TEXT
+);
+CREATE TABLE IF NOT EXISTS rate_slots (
+    key TEXT PRIMARY KEY,
+    next_slot REAL NOT NULL
+);
+'''
+
+def connect(path):
+    """Autocommit connection; callers open BEGIN IMMEDIATE for read-modify-write steps"""
+    # Default rollback journal rather than WAL, which does not work when the file sits on a network share
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+    conn.executescript(SCHEMA)
+    return conn
+
+class WorkQueue:
+    """SQLite-backed queue of page shards shared by every worker process or host
+
+    A claimed shard carries a lease, which its worker renews while it crawls;
+    if the worker dies, the shard goes back to the next claim() once the lease
+    runs out. Updates to a claimed shard only apply while the caller holds it.
+    """
+
+    def __init__(self, path='crawl_queue.sqlite', lease=3600):
+        self.path = path
+        self.lease = lease
+        self.conn = connect(path)
+
+    def seed(self, total_pages, shard_pages=200):
+        """Split pages [0, total_pages) into shards; an already seeded queue is kept as is"""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            existing = self.conn.execute('SELECT COUNT(*) FROM shards').fetchone()[0]
+            if not existing:
+                self.conn.executemany(
+                    'INSERT INTO shards (first_page, pages) VALUES (?, ?)',
+                    [(first, min(shard_pages, total_pages - first)) for first in range(0, total_pages, shard_pages)]
+                )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        if existing:
+            logger.info(f"Queue {self.path} already holds {existing} shards, not reseeding")
+        return self.progress()
+
+    def reset(self):
+        """Drop every shard, so the next seed() starts a new crawl"""
+        self.conn.execute('DELETE FROM shards')
+
+    def claim(self, worker):
+        """Take the next pending or lease-expired shard: (shard id, first page, pages), or None when done"""
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute(
+                "SELECT id, first_page, pages FROM shards "
+                "WHERE status = 'pending' OR (status = 'claimed' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    "UPDATE shards SET status = 'claimed', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker, now + self.lease, row[0])
+                )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def renew(self, shard_id, worker):
+        """Extend the lease on a shard this worker holds; False if it has been handed to another worker"""
+        cursor = self.conn.execute(
+            "UPDATE shards SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'claimed'",
+            (time.time() + self.lease, shard_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id, worker, listings, output):
+        """Mark a shard this worker holds as done; False if it has been handed to another worker"""
+        cursor = self.conn.execute(
+            "UPDATE shards SET status = 'done', lease_until = NULL, listings = ?, output = ? "
+            "WHERE id = ? AND worker = ? AND status = 'claimed'",
+            (listings, output, shard_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, shard_id, worker):
+        """Hand a shard back after a failed attempt, unless another worker holds it by now"""
+        self.conn.execute(
+            "UPDATE shards SET status = 'pending', worker = NULL, lease_until = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'claimed'",
+            (shard_id, worker)
+        )
+
+    def progress(self):
+        """{status: shard count}"""
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM shards GROUP BY status').fetchall())
+
+    def outputs(self):
+        """Output files of finished shards in page order"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT output FROM shards WHERE status = 'done' ORDER BY first_page")]
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+class SharedRateLimiter:
+    """Request rate limit shared through the queue database by all workers
+
+    Each acquire() reserves the next free send slot in one short transaction and
+    sleeps until it, so the site sees at most `rate` requests per second in total
+    however many processes or hosts are crawling. Hosts need roughly synced clocks.
+    """
+
+    def __init__(self, path, rate, key='binalar.az'):
+        self.rate = rate
+        self.key = key
+        self.conn = connect(path)
+        # One connection serves the reservation threads in turn
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Book the next slot and return how long to wait for it"""
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = self.conn.execute('SELECT next_slot FROM rate_slots WHERE key = ?', (self.key,)).fetchone()
+                slot = max(now, row[0] if row else now)
+                self.conn.execute(
+                    'INSERT INTO rate_slots (key, next_slot) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET next_slot = excluded.next_slot',
+                    (self.key, slot + 1 / self.rate)
+                )
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+        return slot - now
+
+    async def acquire(self):
+        """Wait for this process's next slot (no-op when rate is 0/None)"""
+        if not self.rate:
+            return
+        wait = await asyncio.to_thread(self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+async def keep_lease(queue, shard_id, worker):
+    """Renew a shard's lease every third of the lease time until cancelled"""
+    while True:
+        await asyncio.sleep(queue.lease / 3)
+        # One short UPDATE, run inline so it never overlaps other use of the queue's connection
+        if not queue.renew(shard_id, worker):
+            logger.warning(f"Worker {worker}: lost the lease on shard {shard_id}")
+            return
+
+async def run_worker(queue_path, output_dir, worker=None, rate=10.0, lease=3600, **scraper_options):
+    """Claim shards until the queue is empty, writing each to <output_dir>/shard-NNNNNN.csv"""
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    os.makedirs(output_dir, exist_ok=True)
+    queue = WorkQueue(queue_path, lease=lease)
+    limiter = SharedRateLimiter(queue_path, rate)
+    shards = 0
+    try:
+        async with BinalarScraper(request_limiter=limiter, **scraper_options) as scraper:
+            while (shard := queue.claim(worker)) is not None:
+                shard_id, first_page, pages = shard
+                logger.info(f"Worker {worker}: shard {shard_id} (pages {first_page + 1}-{first_page + pages})")
+                output = os.path.join(output_dir, f"shard-{shard_id:06d}.csv")
+                # Written under a private name so a half-finished shard is never merged
+                sink = CsvSink(output, tmp_filename=f"{output}.{worker}.tmp")
+                renewer = asyncio.create_task(keep_lease(queue, shard_id, worker))
+                try:
+                    await scraper.scrape_listings(max_pages=pages, first_page=first_page, on_listing=sink.write)
+                except BaseException:
+                    sink.abort()
+                    queue.release(shard_id, worker)
+                    raise
+                finally:
+                    renewer.cancel()
+                sink.close()
+                if queue.complete(shard_id, worker, scraper.listings_count, output):
+                    shards += 1
+                else:
+                    logger.warning(f"Worker {worker}: shard {shard_id} was reassigned before it finished")
+    finally:
+        limiter.close()
+        queue.close()
+    logger.info(f"Worker {worker}: finished {shards} shards")
+    return shards
+
+def clear_shard_outputs(output_dir):
+    """Remove shard files, finished or partial, left in output_dir by an earlier crawl"""
+    paths = glob.glob(os.path.join(output_dir, 'shard-*.csv')) + glob.glob(os.path.join(output_dir, 'shard-*.csv.*.tmp'))
+    for path in paths:
+        os.remove(path)
+    return len(paths)
+
+def worker_process(queue_path, output_dir, worker, rate, lease, scraper_options):
+    """Entry point for a local worker process"""
+    asyncio.run(run_worker(queue_path, output_dir, worker=worker, rate=rate, lease=lease, **scraper_options))
+
+async def count_pages(base_url, end_page=None):
+    """Number of listing pages to shard, probing the site for the last one unless end_page is given"""
+    async with BinalarScraper(delay=0, end_page=end_page, base_url=base_url) as scraper:
+        return len(scraper.generate_page_urls(end_page=await scraper.find_end_page()))
+
+def merge_outputs(paths, csv_filename, xlsx_filename=None):
+    """Concatenate shard files in page order, keeping the first row seen for each listing id
+
+    Shards are read in page order, so a listing that moved between pages while
+    the crawl ran keeps its newest position and the result does not depend on
+    which worker finished first.
+    """
+    sinks = [CsvSink(csv_filename)]
+    if xlsx_filename:
+        sinks.append(XlsxSink(xlsx_filename))
+    sink = MultiSink(sinks)
+    seen = set()
+    duplicates = 0
+    try:
+        for path in paths:
+            with open(path, newline='', encoding='utf-8') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    listing_id = to_int(row.get('id'))
+                    if listing_id is None or listing_id in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(listing_id)
+                    sink.write(Listing.from_dict(row))
+    except BaseException:
+        sink.abort()
+        raise
+    sink.close()
+    logger.info(f"Merged {len(paths)} shards: {len(seen)} listings, {duplicates} duplicates dropped")
+    return len(seen)
+
+def main():
+    """Seed, run and merge a sharded crawl from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Split the binalar.az crawl into shards worked on by several processes or hosts')
+    parser.add_argument('command', choices=['run', 'seed', 'worker', 'merge', 'status'],
+                        help='run = seed + local workers + merge; seed/worker/merge/status for multi-host crawls')
+    parser.add_argument('--queue', type=str, default='crawl_queue.sqlite', help='Shared work queue database (default: crawl_queue.sqlite)')
+    parser.add_argument('--shard-dir', type=str, default='shards', help='Directory for per-shard outputs (default: shards)')
+    parser.add_argument('--output', type=str, default='binalar_listings', help='Merged output filename without extension (default: binalar_listings)')
+    parser.add_argument('--workers', type=int, default=4, help='Local worker processes for run (default: 4)')
+    parser.add_argument('--max-pages', type=int, default=None, help='Maximum number of pages to seed (default: all)')
+    parser.add_argument('--end-page', type=int, default=None, help='Last page offset to crawl (default: found by probing the site)')
+    parser.add_argument('--shard-pages', type=int, default=200, help='Pages per shard (default: 200)')
+    parser.add_argument('--lease', type=int, default=3600, help='Seconds before an unfinished shard is handed out again (default: 3600)')
+    parser.add_argument('--rate', type=float, default=10.0, help='Requests per second across all workers, pages and phones together (default: 10)')
+    parser.add_argument('--max-concurrent', type=int, default=10, help='Concurrent page requests per worker (default: 10)')
+    parser.add_argument('--delay', type=float, default=0, help='Delay before each page request per worker, in seconds (default: 0)')
+    parser.add_argument('--parser', choices=['bs4', 'lxml'], default='lxml', help='HTML parser backend (default: lxml)')
+    parser.add_argument('--phone-concurrency', type=int, default=10, help='Concurrent phone requests per worker (default: 10)')
+    parser.add_argument('--base-url', type=str, default='https://binalar.az', help='Site to crawl (default: https://binalar.az)')
+    parser.add_argument('--fresh', action='store_true', help='For run/seed: reset the queue and clear --shard-dir to start a new crawl')
+
+    args = parser.parse_args()
+
+    if args.command in ('run', 'seed'):
+        queue = WorkQueue(args.queue)
+        progress = queue.progress()
+        if args.fresh:
+            queue.reset()
+            logger.info(f"Reset queue {args.queue} and removed {clear_shard_outputs(args.shard_dir)} shard files")
+        elif args.command == 'run' and progress and set(progress) == {'done'}:
+            # Merging now would only republish the previous crawl's shards
+            queue.close()
+            parser.error(f"every shard in {args.queue} is already done; pass --fresh to crawl again "
+                         f"or use merge to rebuild the output from the finished shards")
+        queue.close()
+        total_pages = asyncio.run(count_pages(args.base_url, args.end_page))
+        if args.max_pages:
+            total_pages = min(total_pages, args.max_pages)
+        queue = WorkQueue(args.queue)
+        logger.info(f"Queue {args.queue}: {queue.seed(total_pages, args.shard_pages)}")
+        queue.close()
+
+    if args.command in ('run', 'worker'):
+        # The shared limiter paces requests, so per-worker phone rate limiting is switched off
+        scraper_options = {'max_concurrent': args.max_concurrent, 'delay': args.delay,
+                           'parser_backend': args.parser, 'phone_concurrency': args.phone_concurrency,
+                           'phone_rate': 0, 'base_url': args.base_url}
+        if args.command == 'worker':
+            worker_process(args.queue, args.shard_dir, None, args.rate, args.lease, scraper_options)
+        else:
+            processes = [multiprocessing.Process(target=worker_process,
+                                                 args=(args.queue, args.shard_dir, f"{socket.gethostname()}-w{n}",
+                                                       args.rate, args.lease, scraper_options))
+                         for n in range(args.workers)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+    queue = WorkQueue(args.queue)
+    progress = queue.progress()
+    logger.info(f"Queue {args.queue}: {progress}")
+    if args.command in ('run', 'merge'):
+        if set(progress) - {'done'}:
+            logger.warning("Some shards are not finished; merging the finished ones")
+        merge_outputs(queue.outputs(), f"{args.output}.csv", f"{args.output}.xlsx")
+    queue.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,70 @@
-import pandas as pd
-import numpy as np
+import argparse
 
-# Load the dataset
-df = pd.read_csv('binalar_listings.csv')
+from cleaning import CHUNKSIZE, iter_store_listings, DERIVED_COLUMNS, update_clean_listings
+from summary import ListingSummary
+
+parser = argparse.ArgumentParser(description='Print an overview of the scraped listings')
+parser.add_argument('--chunksize', type=int, default=CHUNKSIZE, help=f'Rows read at a time, which bounds peak memory (default: {CHUNKSIZE})')
+parser.add_argument('--store', type=str, default=None, help='Summarize the current listings in a listing store (main.py --store) instead of binalar_listings.csv')
+args = parser.parse_args()
+
+if args.store:
+    # The store is queried directly, skipping listings the last full crawl marked as removed
+    changes = None
+    summary = ListingSummary.from_chunks(iter_store_listings(args.store, chunksize=args.chunksize))
+else:
+    # Clean only listings that are new or changed since the last run, then summarize the clean dataset chunk by chunk
+    changes = update_clean_listings('binalar_listings.csv', 'binalar_listings_clean.csv', chunksize=args.chunksize)
+    summary = ListingSummary.from_csv('binalar_listings_clean.csv', chunksize=args.chunksize)
+raw_columns = [column for column in summary.dtypes.index if column not in DERIVED_COLUMNS]
 
 print("="*80)
 print("DATASET OVERVIEW")
 print("="*80)
-print(f"Total Listings: {len(df):,}")
-print(f"Columns: {list(df.columns)}")
-print(f"\nData Types:\n{df.dtypes}")
-print(f"\nMissing Values:\n{df.isnull().sum()}")
+print(f"Total Listings: {summary.total:,}")
+print(f"Columns: {raw_columns}")
+# Raw scraper fields are read as text; the derived columns carry the real types
+print(f"\nDerived Column Types:\n{summary.dtypes[DERIVED_COLUMNS]}")
+print(f"\nMissing Values:\n{summary.null_counts[raw_columns]}")
 
 print("\n" + "="*80)
 print("BUSINESS KEY METRICS")
 print("="*80)
 
-# Extract city from title
-df['city'] = df['title'].str.split(' / ').str[0]
 print(f"\nTop 10 Cities by Listing Count:")
-print(df['city'].value_counts().head(10))
+print(summary.value_counts('city').head(10))
 
-# Extract property type from title
-df['property_type'] = df['title'].str.split(' / ').str[-1]
 print(f"\nTop 10 Property Types:")
-print(df['property_type'].value_counts().head(10))
+print(summary.value_counts('property_type').head(10))
 
 # Price analysis
-df['price_clean'] = pd.to_numeric(df['price_raw'], errors='coerce')
 print(f"\nPrice Statistics (AZN):")
-print(df['price_clean'].describe())
-print(f"Listings with price: {df['price_clean'].notna().sum():,} ({df['price_clean'].notna().sum()/len(df)*100:.1f}%)")
+print(summary.describe('price_clean'))
+print(f"Listings with price: {summary.notna('price_clean'):,} ({summary.notna('price_clean')/summary.total*100:.1f}%)")
 
 # Room analysis
-df['rooms_clean'] = pd.to_numeric(df['rooms'], errors='coerce')
 print(f"\nRoom Distribution:")
-print(df['rooms_clean'].value_counts().sort_index().head(10))
+print(summary.value_counts('rooms_clean').sort_index().head(10))
 
 # Area analysis
-df['area_clean'] = pd.to_numeric(df['area'], errors='coerce')
 print(f"\nArea Statistics (sqm):")
-print(df['area_clean'].describe())
+print(summary.describe('area_clean'))
 
 # Price per sqm
-df['price_per_sqm'] = df['price_clean'] / df['area_clean']
 print(f"\nPrice per SQM Statistics (AZN):")
-print(df['price_per_sqm'].describe())
+print(summary.describe('price_per_sqm'))
 
 # Date analysis
-df['date_parsed'] = pd.to_datetime(df['date'], format='%d.%m.%Y', errors='coerce')
 print(f"\nDate Range:")
-print(f"Earliest: {df['date_parsed'].min()}")
-print(f"Latest: {df['date_parsed'].max()}")
+print(f"Earliest: {summary.date_min}")
+print(f"Latest: {summary.date_max}")
 print(f"\nListings by Month:")
-print(df['date_parsed'].dt.to_period('M').value_counts().sort_index().tail(10))
+print(summary.value_counts('year_month').sort_index().tail(10))
 
-# Save cleaned data for chart generation
-df.to_csv('binalar_listings_clean.csv', index=False)
 print("\n" + "="*80)
-print("Cleaned data saved to: binalar_listings_clean.csv")
+if changes:
+    print(f"Cleaned data updated in binalar_listings_clean.csv: {changes['added']:,} added, "
+          f"{changes['updated']:,} updated, {changes['removed']:,} removed")
+else:
+    print(f"Summarized current listings in {args.store}")
 print("="*80)
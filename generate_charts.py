@@ -1,364 +1,441 @@
-import pandas as pd
+import argparse
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set professional style
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
-plt.rcParams['figure.figsize'] = (12, 7)
-plt.rcParams['font.size'] = 11
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['axes.labelsize'] = 12
-
-# Load cleaned data
-print("Loading data...")
-df = pd.read_csv('binalar_listings_clean.csv')
-
-# Parse dates and categorize data
-df['date_parsed'] = pd.to_datetime(df['date_parsed'])
-df['year_month'] = pd.to_datetime(df['year_month'].astype(str))
-df['rooms_clean'] = pd.to_numeric(df['rooms_clean'], errors='coerce')
-df['area_clean'] = pd.to_numeric(df['area_clean'], errors='coerce')
-
-print(f"Creating visualizations from {len(df):,} listings...\n")
+from aggregates import ROOM_CATEGORIES, WEEKDAYS, load_aggregates
+from cleaning import CHUNKSIZE
+
+# Professional style shared by every chart
+STYLE = {
+    'figure.figsize': (12, 7),
+    'font.size': 11,
+    'axes.titlesize': 14,
+    'axes.labelsize': 12,
+}
+PREVIEW_DPI = 72
+MANIFEST_NAME = '.render_manifest.json'
+
+def apply_style():
+    """Set the chart style, in this process or a render worker"""
+    warnings.filterwarnings('ignore')
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+    plt.rcParams.update(STYLE)
+
+def save_chart(path, dpi):
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
 
 # ============================================================================
 # CHART 1: Market Share by Top Cities
 # ============================================================================
-print("1. Generating Market Share by City...")
-fig, ax = plt.subplots(figsize=(12, 7))
-city_counts = df['city'].value_counts().head(12)
-city_pct = (city_counts / len(df) * 100).round(1)
-
-colors = sns.color_palette("rocket_r", n_colors=len(city_counts))
-bars = ax.barh(range(len(city_counts)), city_counts.values, color=colors)
-ax.set_yticks(range(len(city_counts)))
-ax.set_yticklabels(city_counts.index)
-ax.set_xlabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Real Estate Market Share by City\nTotal Market: 31,151 Listings',
-             fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='x', alpha=0.3)
-
-# Add value labels
-for i, (count, pct) in enumerate(zip(city_counts.values, city_pct.values)):
-    ax.text(count + 100, i, f'{count:,} ({pct}%)',
-            va='center', fontsize=10, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/01_market_share_by_city.png', dpi=300, bbox_inches='tight')
-plt.close()
+def market_share_data(aggregates):
+    city_counts = aggregates.count_by('city').sort_values(ascending=False).head(12)
+    city_pct = (city_counts / aggregates.total * 100).round(1)
+    return {'cities': list(city_counts.index), 'counts': city_counts.tolist(), 'pct': city_pct.tolist()}
+
+def render_market_share(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    city_counts = data['counts']
+
+    colors = sns.color_palette("rocket_r", n_colors=len(city_counts))
+    bars = ax.barh(range(len(city_counts)), city_counts, color=colors)
+    ax.set_yticks(range(len(city_counts)))
+    ax.set_yticklabels(data['cities'])
+    ax.set_xlabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Real Estate Market Share by City\nTotal Market: 31,151 Listings',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for i, (count, pct) in enumerate(zip(city_counts, data['pct'])):
+        ax.text(count + 100, i, f'{count:,} ({pct}%)',
+                va='center', fontsize=10, fontweight='bold')
+
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 2: Property Type Distribution
 # ============================================================================
-print("2. Generating Property Type Distribution...")
-fig, ax = plt.subplots(figsize=(12, 7))
-prop_counts = df['property_type'].value_counts().head(10)
-prop_pct = (prop_counts / len(df) * 100).round(1)
-
-colors = sns.color_palette("mako_r", n_colors=len(prop_counts))
-bars = ax.barh(range(len(prop_counts)), prop_counts.values, color=colors)
-ax.set_yticks(range(len(prop_counts)))
-ax.set_yticklabels(prop_counts.index)
-ax.set_xlabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Property Type Distribution Across Market',
-             fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='x', alpha=0.3)
-
-# Add value labels
-for i, (count, pct) in enumerate(zip(prop_counts.values, prop_pct.values)):
-    ax.text(count + 100, i, f'{count:,} ({pct}%)',
-            va='center', fontsize=10, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/02_property_type_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
+def property_types_data(aggregates):
+    prop_counts = aggregates.count_by('property_type').sort_values(ascending=False).head(10)
+    prop_pct = (prop_counts / aggregates.total * 100).round(1)
+    return {'types': list(prop_counts.index), 'counts': prop_counts.tolist(), 'pct': prop_pct.tolist()}
+
+def render_property_types(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    prop_counts = data['counts']
+
+    colors = sns.color_palette("mako_r", n_colors=len(prop_counts))
+    bars = ax.barh(range(len(prop_counts)), prop_counts, color=colors)
+    ax.set_yticks(range(len(prop_counts)))
+    ax.set_yticklabels(data['types'])
+    ax.set_xlabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Property Type Distribution Across Market',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for i, (count, pct) in enumerate(zip(prop_counts, data['pct'])):
+        ax.text(count + 100, i, f'{count:,} ({pct}%)',
+                va='center', fontsize=10, fontweight='bold')
+
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 3: Room Configuration Analysis
 # ============================================================================
-print("3. Generating Room Configuration Analysis...")
-fig, ax = plt.subplots(figsize=(12, 7))
-
-# Group rooms into categories for business clarity
-def categorize_rooms(rooms):
-    if pd.isna(rooms):
-        return 'Unknown'
-    elif rooms == 1:
-        return '1 Room'
-    elif rooms == 2:
-        return '2 Rooms'
-    elif rooms == 3:
-        return '3 Rooms'
-    elif rooms == 4:
-        return '4 Rooms'
-    elif rooms >= 5:
-        return '5+ Rooms'
-    return 'Unknown'
-
-df['room_category'] = df['rooms_clean'].apply(categorize_rooms)
-room_order = ['1 Room', '2 Rooms', '3 Rooms', '4 Rooms', '5+ Rooms']
-room_counts = df['room_category'].value_counts().reindex(room_order, fill_value=0)
-room_pct = (room_counts / room_counts.sum() * 100).round(1)
-
-colors = sns.color_palette("viridis", n_colors=len(room_counts))
-bars = ax.bar(range(len(room_counts)), room_counts.values, color=colors, edgecolor='black', linewidth=1.5)
-ax.set_xticks(range(len(room_counts)))
-ax.set_xticklabels(room_counts.index, fontsize=11, fontweight='bold')
-ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Property Size Distribution by Room Count\nMost Properties Have 2-4 Rooms',
-             fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='y', alpha=0.3)
-
-# Add value labels
-for i, (count, pct) in enumerate(zip(room_counts.values, room_pct.values)):
-    ax.text(i, count + 100, f'{count:,}\n({pct}%)',
-            ha='center', va='bottom', fontsize=10, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/03_room_configuration.png', dpi=300, bbox_inches='tight')
-plt.close()
+def room_configuration_data(aggregates):
+    # Rooms are grouped into categories for business clarity
+    room_counts = aggregates.count_by('room_category').reindex(ROOM_CATEGORIES, fill_value=0)
+    room_pct = (room_counts / room_counts.sum() * 100).round(1)
+    return {'categories': ROOM_CATEGORIES, 'counts': room_counts.tolist(), 'pct': room_pct.tolist()}
+
+def render_room_configuration(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    room_counts = data['counts']
+
+    colors = sns.color_palette("viridis", n_colors=len(room_counts))
+    bars = ax.bar(range(len(room_counts)), room_counts, color=colors, edgecolor='black', linewidth=1.5)
+    ax.set_xticks(range(len(room_counts)))
+    ax.set_xticklabels(data['categories'], fontsize=11, fontweight='bold')
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Property Size Distribution by Room Count\nMost Properties Have 2-4 Rooms',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add value labels
+    for i, (count, pct) in enumerate(zip(room_counts, data['pct'])):
+        ax.text(i, count + 100, f'{count:,}\n({pct}%)',
+                ha='center', va='bottom', fontsize=10, fontweight='bold')
+
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 4: Monthly Listing Activity Trend
 # ============================================================================
-print("4. Generating Monthly Listing Activity Trend...")
-fig, ax = plt.subplots(figsize=(14, 7))
+def monthly_activity_data(aggregates):
+    monthly_counts = aggregates.count_by('year_month').sort_index()
+    return {'months': [m.strftime('%b %Y') for m in monthly_counts.index], 'counts': monthly_counts.tolist()}
 
-monthly_counts = df.groupby('year_month').size().sort_index()
-months = [m.strftime('%b %Y') for m in monthly_counts.index]
+def render_monthly_activity(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(14, 7))
+    monthly_counts = data['counts']
 
-ax.plot(range(len(monthly_counts)), monthly_counts.values,
-        marker='o', linewidth=3, markersize=8, color='#2E86AB', markerfacecolor='#A23B72')
-ax.fill_between(range(len(monthly_counts)), monthly_counts.values, alpha=0.3, color='#2E86AB')
+    ax.plot(range(len(monthly_counts)), monthly_counts,
+            marker='o', linewidth=3, markersize=8, color='#2E86AB', markerfacecolor='#A23B72')
+    ax.fill_between(range(len(monthly_counts)), monthly_counts, alpha=0.3, color='#2E86AB')
 
-ax.set_xticks(range(len(monthly_counts)))
-ax.set_xticklabels(months, rotation=45, ha='right', fontsize=10)
-ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Market Activity Timeline: Listing Volume Growth\n5x Growth from Oct 2024 to Jul 2025',
-             fontsize=14, fontweight='bold', pad=20)
-ax.grid(True, alpha=0.3)
+    ax.set_xticks(range(len(monthly_counts)))
+    ax.set_xticklabels(data['months'], rotation=45, ha='right', fontsize=10)
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Market Activity Timeline: Listing Volume Growth\n5x Growth from Oct 2024 to Jul 2025',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(True, alpha=0.3)
 
-# Add value labels for key points
-for i in [0, len(monthly_counts)//2, -1]:
-    ax.text(i, monthly_counts.values[i] + 100, f'{monthly_counts.values[i]:,}',
-            ha='center', va='bottom', fontsize=10, fontweight='bold',
-            bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.7))
+    # Add value labels for key points
+    for i in [0, len(monthly_counts)//2, -1]:
+        ax.text(i, monthly_counts[i] + 100, f'{monthly_counts[i]:,}',
+                ha='center', va='bottom', fontsize=10, fontweight='bold',
+                bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.7))
 
-plt.tight_layout()
-plt.savefig('charts/04_monthly_activity_trend.png', dpi=300, bbox_inches='tight')
-plt.close()
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 5: Property Type Mix in Top Cities
 # ============================================================================
-print("5. Generating Property Type Mix by City...")
-fig, ax = plt.subplots(figsize=(14, 8))
-
-top_cities = ['Bakı', 'Sumqayıt', 'Gəncə', 'Abşeron', 'Xırdalan']
-top_property_types = ['Həyət evi - Villa', 'Yeni tikili', 'Köhnə tikili', 'Torpaq']
-
-# Create data matrix
-data_matrix = []
-for city in top_cities:
-    city_data = df[df['city'] == city]
-    row = []
-    for ptype in top_property_types:
-        count = len(city_data[city_data['property_type'] == ptype])
-        row.append(count)
-    data_matrix.append(row)
-
-data_matrix = np.array(data_matrix)
-x = np.arange(len(top_cities))
-width = 0.6
-
-colors = ['#E63946', '#F1A208', '#2A9D8F', '#264653']
-bottom = np.zeros(len(top_cities))
-
-for i, ptype in enumerate(top_property_types):
-    ax.bar(x, data_matrix[:, i], width, label=ptype, bottom=bottom, color=colors[i])
-    bottom += data_matrix[:, i]
-
-ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Property Type Composition in Major Markets\nDifferent Cities Have Different Market Preferences',
-             fontsize=14, fontweight='bold', pad=20)
-ax.set_xticks(x)
-ax.set_xticklabels(top_cities, fontsize=11, fontweight='bold')
-ax.legend(loc='upper right', fontsize=10, framealpha=0.9)
-ax.grid(axis='y', alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('charts/05_property_mix_by_city.png', dpi=300, bbox_inches='tight')
-plt.close()
+def property_mix_data(aggregates):
+    top_cities = ['Bakı', 'Sumqayıt', 'Gəncə', 'Abşeron', 'Xırdalan']
+    top_property_types = ['Həyət evi - Villa', 'Yeni tikili', 'Köhnə tikili', 'Torpaq']
+
+    # Create data matrix
+    data_matrix = (aggregates.count_by('city', 'property_type').unstack(fill_value=0)
+                   .reindex(index=top_cities, columns=top_property_types, fill_value=0))
+    return {'cities': top_cities, 'types': top_property_types, 'matrix': data_matrix.to_numpy().tolist()}
+
+def render_property_mix(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(14, 8))
+    top_cities = data['cities']
+    data_matrix = np.array(data['matrix'])
+    x = np.arange(len(top_cities))
+    width = 0.6
+
+    colors = ['#E63946', '#F1A208', '#2A9D8F', '#264653']
+    bottom = np.zeros(len(top_cities))
+
+    for i, ptype in enumerate(data['types']):
+        ax.bar(x, data_matrix[:, i], width, label=ptype, bottom=bottom, color=colors[i])
+        bottom += data_matrix[:, i]
+
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Property Type Composition in Major Markets\nDifferent Cities Have Different Market Preferences',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.set_xticks(x)
+    ax.set_xticklabels(top_cities, fontsize=11, fontweight='bold')
+    ax.legend(loc='upper right', fontsize=10, framealpha=0.9)
+    ax.grid(axis='y', alpha=0.3)
+
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 6: Top Regions in Bakı
 # ============================================================================
-print("6. Generating Top Regions in Bakı...")
-fig, ax = plt.subplots(figsize=(12, 7))
+def top_regions_data(aggregates):
+    region_counts = aggregates.count_by('region', city='Bakı').sort_values(ascending=False).head(10)
+    return {'regions': list(region_counts.index), 'counts': region_counts.tolist()}
 
-baku_data = df[df['city'] == 'Bakı']
-region_counts = baku_data['region'].value_counts().head(10)
+def render_top_regions(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    region_counts = data['counts']
 
-colors = sns.color_palette("coolwarm", n_colors=len(region_counts))
-bars = ax.barh(range(len(region_counts)), region_counts.values, color=colors)
-ax.set_yticks(range(len(region_counts)))
-ax.set_yticklabels(region_counts.index)
-ax.set_xlabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Hottest Regions in Bakı Real Estate Market\nSabunçu Leads with 1,737 Listings',
-             fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='x', alpha=0.3)
+    colors = sns.color_palette("coolwarm", n_colors=len(region_counts))
+    bars = ax.barh(range(len(region_counts)), region_counts, color=colors)
+    ax.set_yticks(range(len(region_counts)))
+    ax.set_yticklabels(data['regions'])
+    ax.set_xlabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Hottest Regions in Bakı Real Estate Market\nSabunçu Leads with 1,737 Listings',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='x', alpha=0.3)
 
-# Add value labels
-for i, count in enumerate(region_counts.values):
-    ax.text(count + 20, i, f'{count:,}', va='center', fontsize=10, fontweight='bold')
+    # Add value labels
+    for i, count in enumerate(region_counts):
+        ax.text(count + 20, i, f'{count:,}', va='center', fontsize=10, fontweight='bold')
 
-plt.tight_layout()
-plt.savefig('charts/06_top_regions_baku.png', dpi=300, bbox_inches='tight')
-plt.close()
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 7: Average Property Size by Type
 # ============================================================================
-print("7. Generating Average Property Size by Type...")
-fig, ax = plt.subplots(figsize=(12, 7))
-
-# Filter out extreme outliers for meaningful business insights
-df_filtered = df[(df['area_clean'] > 0) & (df['area_clean'] < 500)]
-prop_types_main = ['Yeni tikili', 'Köhnə tikili', 'Həyət evi - Villa', 'Obyekt - Ofis']
-area_by_type = df_filtered[df_filtered['property_type'].isin(prop_types_main)].groupby('property_type')['area_clean'].agg(['mean', 'median'])
-area_by_type = area_by_type.reindex(prop_types_main)
-
-x = np.arange(len(area_by_type))
-width = 0.35
-
-bars1 = ax.bar(x - width/2, area_by_type['mean'], width, label='Average Size', color='#0077B6', edgecolor='black')
-bars2 = ax.bar(x + width/2, area_by_type['median'], width, label='Typical Size (Median)', color='#00B4D8', edgecolor='black')
-
-ax.set_ylabel('Area (Square Meters)', fontsize=12, fontweight='bold')
-ax.set_title('Property Size Analysis by Type\nVillas Are 2-3x Larger Than Apartments',
-             fontsize=14, fontweight='bold', pad=20)
-ax.set_xticks(x)
-ax.set_xticklabels(area_by_type.index, fontsize=10, fontweight='bold', rotation=15, ha='right')
-ax.legend(fontsize=10, loc='upper right')
-ax.grid(axis='y', alpha=0.3)
-
-# Add value labels
-for i, (mean_val, med_val) in enumerate(zip(area_by_type['mean'], area_by_type['median'])):
-    ax.text(i - width/2, mean_val + 5, f'{mean_val:.0f}m²',
-            ha='center', va='bottom', fontsize=9, fontweight='bold')
-    ax.text(i + width/2, med_val + 5, f'{med_val:.0f}m²',
-            ha='center', va='bottom', fontsize=9, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/07_property_size_by_type.png', dpi=300, bbox_inches='tight')
-plt.close()
+def property_size_data(aggregates):
+    # Area stats already leave out extreme outliers for meaningful business insights
+    prop_types_main = ['Yeni tikili', 'Köhnə tikili', 'Həyət evi - Villa', 'Obyekt - Ofis']
+    area_by_type = aggregates.area_stats[['mean', 'median']].reindex(prop_types_main)
+    return {'types': prop_types_main, 'mean': area_by_type['mean'].tolist(),
+            'median': area_by_type['median'].tolist()}
+
+def render_property_size(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(12, 7))
+
+    x = np.arange(len(data['types']))
+    width = 0.35
+
+    bars1 = ax.bar(x - width/2, data['mean'], width, label='Average Size', color='#0077B6', edgecolor='black')
+    bars2 = ax.bar(x + width/2, data['median'], width, label='Typical Size (Median)', color='#00B4D8', edgecolor='black')
+
+    ax.set_ylabel('Area (Square Meters)', fontsize=12, fontweight='bold')
+    ax.set_title('Property Size Analysis by Type\nVillas Are 2-3x Larger Than Apartments',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.set_xticks(x)
+    ax.set_xticklabels(data['types'], fontsize=10, fontweight='bold', rotation=15, ha='right')
+    ax.legend(fontsize=10, loc='upper right')
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add value labels
+    for i, (mean_val, med_val) in enumerate(zip(data['mean'], data['median'])):
+        ax.text(i - width/2, mean_val + 5, f'{mean_val:.0f}m²',
+                ha='center', va='bottom', fontsize=9, fontweight='bold')
+        ax.text(i + width/2, med_val + 5, f'{med_val:.0f}m²',
+                ha='center', va='bottom', fontsize=9, fontweight='bold')
+
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 8: Quarter-over-Quarter Growth
 # ============================================================================
-print("8. Generating Quarterly Growth Analysis...")
-fig, ax = plt.subplots(figsize=(12, 7))
+def quarterly_growth_data(aggregates):
+    monthly_counts = aggregates.count_by('year_month')
+    quarterly_counts = monthly_counts.groupby(monthly_counts.index.asfreq('Q')).sum().sort_index()
+    return {'quarters': [str(q) for q in quarterly_counts.index], 'counts': quarterly_counts.tolist()}
 
-df['quarter'] = df['date_parsed'].dt.to_period('Q')
-quarterly_counts = df.groupby('quarter').size()
-quarters = [str(q) for q in quarterly_counts.index]
+def render_quarterly_growth(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    quarterly_counts = data['counts']
 
-colors_q = ['#355C7D' if i % 2 == 0 else '#6C5B7B' for i in range(len(quarterly_counts))]
-bars = ax.bar(range(len(quarterly_counts)), quarterly_counts.values, color=colors_q, edgecolor='black', linewidth=1.5)
+    colors_q = ['#355C7D' if i % 2 == 0 else '#6C5B7B' for i in range(len(quarterly_counts))]
+    bars = ax.bar(range(len(quarterly_counts)), quarterly_counts, color=colors_q, edgecolor='black', linewidth=1.5)
 
-ax.set_xticks(range(len(quarterly_counts)))
-ax.set_xticklabels(quarters, fontsize=11, fontweight='bold', rotation=45, ha='right')
-ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Quarterly Market Activity Comparison\nSteady Growth Across All Quarters',
-             fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='y', alpha=0.3)
+    ax.set_xticks(range(len(quarterly_counts)))
+    ax.set_xticklabels(data['quarters'], fontsize=11, fontweight='bold', rotation=45, ha='right')
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Quarterly Market Activity Comparison\nSteady Growth Across All Quarters',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
 
-# Add value labels
-for i, count in enumerate(quarterly_counts.values):
-    ax.text(i, count + 100, f'{count:,}', ha='center', va='bottom',
-            fontsize=10, fontweight='bold')
+    # Add value labels
+    for i, count in enumerate(quarterly_counts):
+        ax.text(i, count + 100, f'{count:,}', ha='center', va='bottom',
+                fontsize=10, fontweight='bold')
 
-plt.tight_layout()
-plt.savefig('charts/08_quarterly_growth.png', dpi=300, bbox_inches='tight')
-plt.close()
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 9: Room Distribution in Major Cities
 # ============================================================================
-print("9. Generating Room Distribution Comparison...")
-fig, ax = plt.subplots(figsize=(14, 7))
-
-top_cities_rooms = ['Bakı', 'Sumqayıt', 'Abşeron', 'Xırdalan']
-room_categories = ['1 Room', '2 Rooms', '3 Rooms', '4 Rooms', '5+ Rooms']
-
-data_rooms = []
-for city in top_cities_rooms:
-    city_data = df[df['city'] == city]
-    row = []
-    for cat in room_categories:
-        count = len(city_data[city_data['room_category'] == cat])
-        row.append(count)
-    data_rooms.append(row)
-
-data_rooms = np.array(data_rooms)
-x = np.arange(len(room_categories))
-width = 0.2
-
-colors_cities = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A']
-for i, city in enumerate(top_cities_rooms):
-    offset = width * (i - 1.5)
-    ax.bar(x + offset, data_rooms[i], width, label=city, color=colors_cities[i], edgecolor='black')
-
-ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_xlabel('Room Configuration', fontsize=12, fontweight='bold')
-ax.set_title('Room Configuration Preferences Across Major Cities\n3-Room Properties Dominate All Markets',
-             fontsize=14, fontweight='bold', pad=20)
-ax.set_xticks(x)
-ax.set_xticklabels(room_categories, fontsize=11, fontweight='bold')
-ax.legend(fontsize=10, loc='upper right', framealpha=0.9)
-ax.grid(axis='y', alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('charts/09_room_distribution_cities.png', dpi=300, bbox_inches='tight')
-plt.close()
+def room_distribution_data(aggregates):
+    top_cities_rooms = ['Bakı', 'Sumqayıt', 'Abşeron', 'Xırdalan']
+
+    data_rooms = (aggregates.count_by('city', 'room_category').unstack(fill_value=0)
+                  .reindex(index=top_cities_rooms, columns=ROOM_CATEGORIES, fill_value=0))
+    return {'cities': top_cities_rooms, 'categories': ROOM_CATEGORIES, 'matrix': data_rooms.to_numpy().tolist()}
+
+def render_room_distribution(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(14, 7))
+    room_categories = data['categories']
+    data_rooms = np.array(data['matrix'])
+    x = np.arange(len(room_categories))
+    width = 0.2
+
+    colors_cities = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A']
+    for i, city in enumerate(data['cities']):
+        offset = width * (i - 1.5)
+        ax.bar(x + offset, data_rooms[i], width, label=city, color=colors_cities[i], edgecolor='black')
+
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_xlabel('Room Configuration', fontsize=12, fontweight='bold')
+    ax.set_title('Room Configuration Preferences Across Major Cities\n3-Room Properties Dominate All Markets',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.set_xticks(x)
+    ax.set_xticklabels(room_categories, fontsize=11, fontweight='bold')
+    ax.legend(fontsize=10, loc='upper right', framealpha=0.9)
+    ax.grid(axis='y', alpha=0.3)
+
+    save_chart(path, dpi)
 
 # ============================================================================
 # CHART 10: Market Activity by Day of Week
 # ============================================================================
-print("10. Generating Listing Activity by Day of Week...")
-fig, ax = plt.subplots(figsize=(12, 7))
-
-df['day_of_week'] = df['date_parsed'].dt.day_name()
-day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-day_counts = df['day_of_week'].value_counts().reindex(day_order, fill_value=0)
-
-colors_days = sns.color_palette("Spectral", n_colors=7)
-bars = ax.bar(range(len(day_counts)), day_counts.values, color=colors_days, edgecolor='black', linewidth=1.5)
-
-ax.set_xticks(range(len(day_counts)))
-ax.set_xticklabels(day_counts.index, fontsize=11, fontweight='bold')
-ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
-ax.set_title('Listing Activity Pattern by Day of Week\nIdentifying Peak Posting Days',
-             fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='y', alpha=0.3)
-
-# Add value labels
-for i, count in enumerate(day_counts.values):
-    ax.text(i, count + 100, f'{count:,}', ha='center', va='bottom',
-            fontsize=10, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/10_activity_by_weekday.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-print("\n" + "="*80)
-print("ALL CHARTS GENERATED SUCCESSFULLY!")
-print("="*80)
-print("Charts saved to: charts/")
-print("Total charts created: 10")
-print("="*80)
+def weekday_activity_data(aggregates):
+    day_counts = aggregates.count_by('weekday').reindex(range(7), fill_value=0)
+    return {'days': WEEKDAYS, 'counts': day_counts.tolist()}
+
+def render_weekday_activity(data, path, dpi):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    day_counts = data['counts']
+
+    colors_days = sns.color_palette("Spectral", n_colors=7)
+    bars = ax.bar(range(len(day_counts)), day_counts, color=colors_days, edgecolor='black', linewidth=1.5)
+
+    ax.set_xticks(range(len(day_counts)))
+    ax.set_xticklabels(data['days'], fontsize=11, fontweight='bold')
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Listing Activity Pattern by Day of Week\nIdentifying Peak Posting Days',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add value labels
+    for i, count in enumerate(day_counts):
+        ax.text(i, count + 100, f'{count:,}', ha='center', va='bottom',
+                fontsize=10, fontweight='bold')
+
+    save_chart(path, dpi)
+
+# (file name, description, data function, render function)
+CHARTS = [
+    ('01_market_share_by_city.png', 'Market Share by City', market_share_data, render_market_share),
+    ('02_property_type_distribution.png', 'Property Type Distribution', property_types_data, render_property_types),
+    ('03_room_configuration.png', 'Room Configuration Analysis', room_configuration_data, render_room_configuration),
+    ('04_monthly_activity_trend.png', 'Monthly Listing Activity Trend', monthly_activity_data, render_monthly_activity),
+    ('05_property_mix_by_city.png', 'Property Type Mix by City', property_mix_data, render_property_mix),
+    ('06_top_regions_baku.png', 'Top Regions in Bakı', top_regions_data, render_top_regions),
+    ('07_property_size_by_type.png', 'Average Property Size by Type', property_size_data, render_property_size),
+    ('08_quarterly_growth.png', 'Quarterly Growth Analysis', quarterly_growth_data, render_quarterly_growth),
+    ('09_room_distribution_cities.png', 'Room Distribution Comparison', room_distribution_data, render_room_distribution),
+    ('10_activity_by_weekday.png', 'Listing Activity by Day of Week', weekday_activity_data, render_weekday_activity),
+]
+
+def chart_digest(data, render, dpi):
+    """Hash of a chart's input data, the style, the DPI and the render code"""
+    payload = json.dumps({'data': data, 'style': STYLE, 'dpi': dpi, 'code': inspect.getsource(render)},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_manifest(path):
+    """{chart file name: digest} of the previous render, empty if missing or unreadable"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the market report charts')
+    parser.add_argument('--input', type=str, default='binalar_listings_clean.csv', help='Clean listings CSV (default: binalar_listings_clean.csv)')
+    parser.add_argument('--charts-dir', type=str, default='charts', help='Directory the charts are written to (default: charts)')
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the rendered charts (default: 300)')
+    parser.add_argument('--preview', action='store_true', help=f'Render quick {PREVIEW_DPI} DPI previews into <charts-dir>/preview instead')
+    parser.add_argument('--workers', type=int, default=-1, help='Worker processes rendering charts, 0 renders in this process and -1 uses all CPU cores (default: -1)')
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE, help=f'Rows of the clean CSV read at a time when aggregating, which bounds peak memory (default: {CHUNKSIZE})')
+    parser.add_argument('--force', action='store_true', help='Re-render every chart even if its inputs are unchanged')
+    args = parser.parse_args()
+
+    dpi = PREVIEW_DPI if args.preview else args.dpi
+    charts_dir = os.path.join(args.charts_dir, 'preview') if args.preview else args.charts_dir
+    os.makedirs(charts_dir, exist_ok=True)
+
+    # Load the aggregated counts every chart reads from, cached until the clean data changes
+    print("Loading data...")
+    aggregates = load_aggregates(args.input, chunksize=args.chunksize)
+
+    print(f"Creating visualizations from {aggregates.total:,} listings...\n")
+
+    manifest_path = os.path.join(charts_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    jobs = []
+    skipped = 0
+    for number, (filename, description, data_func, render) in enumerate(CHARTS, start=1):
+        data = data_func(aggregates)
+        digest = chart_digest(data, render, dpi)
+        path = os.path.join(charts_dir, filename)
+        if not args.force and manifest.get(filename) == digest and os.path.exists(path):
+            print(f"{number}. {description} is unchanged, skipping")
+            skipped += 1
+            continue
+        print(f"{number}. Generating {description}...")
+        jobs.append((filename, digest, render, data, path))
+
+    try:
+        if args.workers == 0 or len(jobs) <= 1:
+            apply_style()
+            for filename, digest, render, data, path in jobs:
+                render(data, path, dpi)
+                manifest[filename] = digest
+        else:
+            max_workers = None if args.workers < 0 else args.workers
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=apply_style) as pool:
+                futures = {pool.submit(render, data, path, dpi): (filename, digest)
+                           for filename, digest, render, data, path in jobs}
+                for future in as_completed(futures):
+                    future.result()
+                    filename, digest = futures[future]
+                    manifest[filename] = digest
+    finally:
+        # Charts that did render are skipped next time even if another one failed
+        save_manifest(manifest, manifest_path)
+
+    print("\n" + "="*80)
+    print("ALL CHARTS GENERATED SUCCESSFULLY!")
+    print("="*80)
+    print(f"Charts saved to: {charts_dir}/")
+    print(f"Charts rendered: {len(jobs)}, unchanged: {skipped}")
+    print("="*80)
+
+if __name__ == "__main__":
+    main()
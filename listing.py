@@ -0,0 +1,144 @@
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+
+DATE_FORMAT = '%d.%m.%Y'
+
+def to_int(value):
+    """int(value), or None when it is missing or not a number"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def to_float(value):
+    """float(value), or None when it is missing or not a number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def to_date(value):
+    """Parse the site's dd.mm.yyyy dates (or ISO dates), None when missing or malformed"""
+    if isinstance(value, date):
+        return value
+    for date_format in (DATE_FORMAT, '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def split_title(title):
+    """Split 'City / Region / Property type' into (city, region, property_type)"""
+    if not title:
+        return None, None, None
+    parts = str(title).split(' / ')
+    region = parts[1] if len(parts) > 1 else None
+    return parts[0], region, parts[-1]
+
+@dataclass(slots=True)
+class Listing:
+    """One scraped listing with its numeric fields already parsed"""
+
+    id: int
+    url: str = None
+    title: str = None
+    price: int = None
+    price_raw: str = None
+    rooms: int = None
+    area: float = None
+    floor: str = None
+    description: str = None
+    date: date = None
+    # The site's date text, kept only when it could not be parsed into `date`
+    date_raw: str = None
+    address: str = None
+    visible_phone: str = None
+    phone_id: str = None
+    phone: str = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a listing from parser output, to_dict() or a CSV row, converting the numeric and date fields"""
+        listing = cls(**{name: data.get(name) for name in LISTING_FIELDS})
+        listing.id = to_int(listing.id)
+        listing.price = to_int(listing.price)
+        listing.rooms = to_int(listing.rooms)
+        listing.area = to_float(listing.area)
+        date_text = listing.date
+        listing.date = to_date(date_text)
+        if listing.date is None and date_text and not listing.date_raw:
+            listing.date_raw = str(date_text)
+        return listing
+
+    def to_dict(self):
+        """JSON-safe dict (date as ISO string) for journals and caches"""
+        data = {name: getattr(self, name) for name in LISTING_FIELDS}
+        if self.date is not None:
+            data['date'] = self.date.isoformat()
+        return data
+
+    def date_value(self):
+        """The parsed date, or the site's text when it could not be parsed"""
+        return self.date if self.date is not None else self.date_raw
+
+    def to_row(self, fieldnames):
+        """Text values for CSV output, in the formats the site uses"""
+        row = {}
+        for name in fieldnames:
+            value = self.date_value() if name == 'date' else getattr(self, name)
+            if value is None:
+                value = ''
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)
+            elif isinstance(value, date):
+                value = value.strftime(DATE_FORMAT)
+            row[name] = value
+        return row
+
+LISTING_FIELDS = [field.name for field in fields(Listing)]
+
+class IdSet:
+    """Set of listing ids kept as a bitmap, one bit per possible id
+
+    Listing ids are dense positive integers, so a bitmap holds a full crawl's
+    ids in well under a megabyte; the rare id outside the bitmap range goes to
+    a plain set instead.
+    """
+
+    MAX_BITMAP_ID = 1 << 28
+
+    def __init__(self, ids=()):
+        self.bits = bytearray()
+        self.overflow = set()
+        self.count = 0
+        for listing_id in ids:
+            self.add(listing_id)
+
+    def add(self, listing_id):
+        """Add an id; returns False if it was already present"""
+        if not 0 <= listing_id < self.MAX_BITMAP_ID:
+            if listing_id in self.overflow:
+                return False
+            self.overflow.add(listing_id)
+            self.count += 1
+            return True
+        byte, bit = divmod(listing_id, 8)
+        if byte >= len(self.bits):
+            # Grow at least geometrically so a rising id sequence stays cheap
+            self.bits.extend(bytes(max(byte + 1 - len(self.bits), len(self.bits))))
+        mask = 1 << bit
+        if self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        self.count += 1
+        return True
+
+    def __contains__(self, listing_id):
+        if not 0 <= listing_id < self.MAX_BITMAP_ID:
+            return listing_id in self.overflow
+        byte, bit = divmod(listing_id, 8)
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << bit))
+
+    def __len__(self):
+        return self.count
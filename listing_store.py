@@ -0,0 +1,159 @@
+import sqlite3
+import logging
+from contextlib import closing
+from datetime import datetime
+
+from listing import split_title
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY,
+    phone TEXT,
+    title TEXT,
+    city TEXT,
+    region TEXT,
+    property_type TEXT,
+    price INTEGER,
+    price_raw TEXT,
+    rooms INTEGER,
+    area REAL,
+    floor TEXT,
+    description TEXT,
+    date TEXT,
+    date_raw TEXT,
+    address TEXT,
+    visible_phone TEXT,
+    phone_id TEXT,
+    url TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    removed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS price_history (
+    id INTEGER NOT NULL,
+    price INTEGER,
+    price_raw TEXT,
+    seen_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_listings_city ON listings (city);
+CREATE INDEX IF NOT EXISTS idx_listings_property_type ON listings (property_type);
+CREATE INDEX IF NOT EXISTS idx_listings_date ON listings (date);
+CREATE INDEX IF NOT EXISTS idx_listings_last_seen ON listings (last_seen);
+CREATE INDEX IF NOT EXISTS idx_price_history_id ON price_history (id, seen_at);
+
+-- History rows come from triggers so every write path records price changes
+CREATE TRIGGER IF NOT EXISTS trg_price_insert AFTER INSERT ON listings
+BEGIN
+    INSERT INTO price_history (id, price, price_raw, seen_at) VALUES (new.id, new.price, new.price_raw, new.last_seen);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_price_update AFTER UPDATE OF price ON listings
+WHEN old.price IS NOT new.price
+BEGIN
+    INSERT INTO price_history (id, price, price_raw, seen_at) VALUES (new.id, new.price, new.price_raw, new.last_seen);
+END;
+'''
+
+COLUMNS = ['id', 'phone', 'title', 'city', 'region', 'property_type', 'price', 'price_raw', 'rooms',
+           'area', 'floor', 'description', 'date', 'date_raw', 'address', 'visible_phone', 'phone_id', 'url']
+
+UPSERT = (
+    f"INSERT INTO listings ({', '.join(COLUMNS)}, first_seen, last_seen) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)}, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ', '.join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+    + ", last_seen = excluded.last_seen, removed_at = NULL"
+)
+
+class ListingStore:
+    """SQLite store of listings keyed by id, with first/last seen times and price history
+
+    Works as a pipeline sink: write() upserts one listing, close() commits.
+    """
+
+    def __init__(self, path='binalar_listings.sqlite', commit_every=500):
+        self.path = path
+        self.commit_every = commit_every
+        self.pending_writes = 0
+        self.rows = 0
+        self.seen_at = datetime.now().isoformat(timespec='seconds')
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        # Stores created before date_raw existed
+        existing = {row[1] for row in self.conn.execute('PRAGMA table_info(listings)')}
+        if 'date_raw' not in existing:
+            self.conn.execute('ALTER TABLE listings ADD COLUMN date_raw TEXT')
+        self.conn.commit()
+
+    def write(self, listing):
+        """Insert or update one listing"""
+        city, region, property_type = split_title(listing.title)
+        values = {
+            'city': city,
+            'region': region,
+            'property_type': property_type,
+            'date': listing.date.isoformat() if listing.date else None,
+        }
+        row = [values[column] if column in values else getattr(listing, column) for column in COLUMNS]
+        row = [None if value == '' else value for value in row]
+        self.conn.execute(UPSERT, row + [self.seen_at, self.seen_at])
+
+        self.rows += 1
+        self.pending_writes += 1
+        if self.pending_writes >= self.commit_every:
+            self.flush()
+
+    def mark_missing_as_removed(self):
+        """After a full crawl, flag listings this run did not see as removed"""
+        cursor = self.conn.execute(
+            'UPDATE listings SET removed_at = ? WHERE last_seen < ? AND removed_at IS NULL',
+            (self.seen_at, self.seen_at)
+        )
+        self.conn.commit()
+        logger.info(f"Marked {cursor.rowcount} listings as removed")
+        return cursor.rowcount
+
+    def flush(self):
+        """Commit pending writes"""
+        if self.pending_writes:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        if self.conn:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+            logger.info(f"Data saved to {self.path} ({self.rows} rows)")
+
+def listing_columns(path):
+    """Column names of the listings table, which lacks date_raw in stores created before it existed"""
+    with closing(sqlite3.connect(path)) as conn:
+        return [row[1] for row in conn.execute('PRAGMA table_info(listings)')]
+
+def read_listings(path, columns='*', where=None, params=(), chunksize=None):
+    """Load listings into a DataFrame, filtering in SQL (city/property_type/date are indexed)
+
+    With `chunksize`, returns an iterator of DataFrames of at most that many rows instead.
+    """
+    query = f"SELECT {columns} FROM listings"
+    if where:
+        query += f" WHERE {where}"
+    if chunksize:
+        return _read_chunks(path, query, params, chunksize)
+    with closing(sqlite3.connect(path)) as conn:
+        return _read_query(conn, query, params)
+
+def _read_query(conn, query, params, chunksize=None):
+    import pandas as pd
+
+    return pd.read_sql_query(query, conn, params=params, chunksize=chunksize,
+                             parse_dates=['date', 'first_seen', 'last_seen'])
+
+def _read_chunks(path, query, params, chunksize):
+    with closing(sqlite3.connect(path)) as conn:
+        yield from _read_query(conn, query, params, chunksize)
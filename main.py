@@ -4,23 +4,366 @@ import re
 import csv
 import json
 from bs4 import BeautifulSoup
-import pandas as pd
+from lxml import etree
 from datetime import datetime
 from urllib.parse import urljoin
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from phone_scheduler import PhoneLookupError, PhoneScheduler
+from phone_cache import PhoneCache
+from checkpoint import CheckpointJournal
+from page_cache import PageCache
+from listing import IdSet, Listing, to_int
+from listing_store import ListingStore
+from metrics import PipelineMetrics
+from progress import ProgressReporter
+from sinks import FIELDNAMES, CsvSink, MultiSink, ParquetSink, XlsxSink
+from rate_control import RETRY_STATUSES, AdaptiveConcurrency, RetryPolicy, parse_retry_after
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+PRICE_STRIP_RE = re.compile(r'[^\d,]')
+ROOMS_RE = re.compile(r'(\d+)\s*otaq')
+AREA_RE = re.compile(r'(\d+)\s*m[²2]')
+# Fallback last page offset when it cannot be discovered
+DEFAULT_END_PAGE = 194656
+
+PHONE_RE = re.compile(r'\((\d{3})\)\s*(\d{3})-(\d{2})-(\d{2})')
+
+def extract_listing_id_from_url(url_path):
+    """Extract listing ID from URL path like '/4-otaqli-menzil-kohne-tikili-satilir-montin-nerimanov-35807'"""
+    parts = url_path.strip('/').split('-')
+    if parts:
+        # ID is usually at the end
+        try:
+            return int(parts[-1])
+        except ValueError:
+            return None
+    return None
+
+def parse_listings_from_page(html_content, base_url):
+    """Parse listings from a single page into plain dicts (module level so worker processes can run it)"""
+    soup = BeautifulSoup(html_content, 'lxml')
+    listings = []
+
+    # Find all listing cards
+    listing_cards = soup.find_all('div', class_='card style-6 prop_item')
+
+    for card in listing_cards:
+        try:
+            listing_data = {}
+
+            # Extract URL and ID
+            link_elem = card.find('a', href=True)
+            if link_elem:
+                listing_url = link_elem['href']
+                listing_data['url'] = urljoin(base_url, listing_url)
+                listing_data['id'] = extract_listing_id_from_url(listing_url)
+
+            # Extract price
+            price_elem = card.find('span', class_='text-primary fw-bold')
+            if price_elem:
+                price_text = price_elem.get_text(strip=True)
+                # Remove currency and clean price
+                price_clean = PRICE_STRIP_RE.sub('', price_text).replace(',', '')
+                listing_data['price'] = price_clean
+                listing_data['price_raw'] = price_text
+
+            # Extract title and location
+            title_elem = card.find('b', class_='prop_title')
+            if title_elem:
+                listing_data['title'] = title_elem.get_text(strip=True)
+
+            # Extract details (rooms, area, floor)
+            detail_items = card.find_all('li', class_='d-flex align-items-center flex-fill')
+            for item in detail_items:
+                text = item.get_text(strip=True)
+                if 'otaq' in text:
+                    rooms_match = ROOMS_RE.search(text)
+                    listing_data['rooms'] = rooms_match.group(1) if rooms_match else None
+                elif 'm²' in text or 'm2' in text:
+                    area_match = AREA_RE.search(text)
+                    listing_data['area'] = area_match.group(1) if area_match else None
+                elif 'mərtəbə' in text:
+                    listing_data['floor'] = text.replace('mərtəbə', '').strip()
+
+            # Extract description
+            desc_elem = card.find('p', class_='short_info')
+            if desc_elem:
+                listing_data['description'] = desc_elem.get_text(strip=True)
+
+            # Extract date
+            date_elem = card.find('div', class_='col-auto text-end text-body-tertiary')
+            if date_elem:
+                listing_data['date'] = date_elem.get_text(strip=True)
+
+            # Extract address
+            address_elem = card.find('p', class_='text-body-tertiary mb-0 address')
+            if address_elem:
+                listing_data['address'] = address_elem.get_text(strip=True).replace('Ünvan', '').strip()
+
+            # Extract phone button ID for API call
+            phone_btn = card.find('div', class_='phone_btn')
+            if phone_btn and phone_btn.get('rel'):
+                listing_data['phone_id'] = phone_btn['rel']
+
+            # Check for already visible phone numbers
+            phone_visible = card.find('span', class_='text-success')
+            if phone_visible:
+                phone_text = phone_visible.get_text(strip=True)
+                # Look for phone patterns
+                phone_match = PHONE_RE.search(phone_text)
+                if phone_match:
+                    visible_phone = f"({phone_match.group(1)}) {phone_match.group(2)}-{phone_match.group(3)}-{phone_match.group(4)}"
+                    listing_data['visible_phone'] = visible_phone
+
+            if listing_data.get('id'):
+                listings.append(Listing.from_dict(listing_data))
+
+        except Exception as e:
+            logger.error(f"Error parsing listing: {str(e)}")
+            continue
+
+    return listings
+
+# Selectors for the lxml backend. Multi-class selectors compare the whole
+# normalized class attribute, single classes match one token, as bs4 does.
+CARD_XPATH = etree.XPath("//div[normalize-space(@class)='card style-6 prop_item']")
+CARD_FIELDS = {
+    ('span', 'text-primary fw-bold'): 'price',
+    ('b', 'prop_title'): 'title',
+    ('p', 'short_info'): 'description',
+    ('div', 'col-auto text-end text-body-tertiary'): 'date',
+    ('p', 'text-body-tertiary mb-0 address'): 'address',
+    ('div', 'phone_btn'): 'phone_btn',
+    ('span', 'text-success'): 'phone_visible',
+}
+DETAIL_CLASS = 'd-flex align-items-center flex-fill'
+# bs4's get_text() leaves out the contents of these tags
+SKIPPED_TEXT_TAGS = frozenset(['script', 'style', 'template'])
+UTF8_HTML_PARSER = etree.HTMLParser(encoding='utf-8')
+
+def _element_text(elem):
+    """Equivalent of bs4's get_text(strip=True) for an lxml element"""
+    return ''.join(part.strip() for part in elem.itertext())
+
+def _scan_card(card):
+    """Walk a card once and pick out the first element for every field, plus all detail items"""
+    found = {}
+    details = []
+    for elem in card.iterdescendants():
+        tag = elem.tag
+        if not isinstance(tag, str):
+            continue
+        if tag in SKIPPED_TEXT_TAGS:
+            elem.text = None
+            continue
+        if tag == 'a':
+            if 'link' not in found and elem.get('href') is not None:
+                found['link'] = elem
+            continue
+
+        class_attr = elem.get('class')
+        if not class_attr:
+            continue
+        classes = class_attr.split()
+        joined = ' '.join(classes)
+        if tag == 'li':
+            if joined == DETAIL_CLASS:
+                details.append(elem)
+            continue
+
+        field = CARD_FIELDS.get((tag, joined))
+        if field is None:
+            for css_class in classes:
+                field = CARD_FIELDS.get((tag, css_class))
+                if field:
+                    break
+        if field and field not in found:
+            found[field] = elem
+    return found, details
+
+def parse_listings_from_page_lxml(html_content, base_url):
+    """Parse listings with lxml directly; yields the same dicts as parse_listings_from_page"""
+    if not html_content:
+        return []
+    if isinstance(html_content, str):
+        root = etree.fromstring(html_content.encode('utf-8'), UTF8_HTML_PARSER)
+    else:
+        root = etree.fromstring(html_content, etree.HTMLParser())
+    if root is None:
+        return []
+
+    listings = []
+    for card in CARD_XPATH(root):
+        try:
+            listing_data = {}
+            found, details = _scan_card(card)
+
+            link_elem = found.get('link')
+            if link_elem is not None:
+                listing_url = link_elem.get('href')
+                listing_data['url'] = urljoin(base_url, listing_url)
+                listing_data['id'] = extract_listing_id_from_url(listing_url)
+
+            price_elem = found.get('price')
+            if price_elem is not None:
+                price_text = _element_text(price_elem)
+                listing_data['price'] = PRICE_STRIP_RE.sub('', price_text).replace(',', '')
+                listing_data['price_raw'] = price_text
+
+            title_elem = found.get('title')
+            if title_elem is not None:
+                listing_data['title'] = _element_text(title_elem)
+
+            for item in details:
+                text = _element_text(item)
+                if 'otaq' in text:
+                    rooms_match = ROOMS_RE.search(text)
+                    listing_data['rooms'] = rooms_match.group(1) if rooms_match else None
+                elif 'm²' in text or 'm2' in text:
+                    area_match = AREA_RE.search(text)
+                    listing_data['area'] = area_match.group(1) if area_match else None
+                elif 'mərtəbə' in text:
+                    listing_data['floor'] = text.replace('mərtəbə', '').strip()
+
+            desc_elem = found.get('description')
+            if desc_elem is not None:
+                listing_data['description'] = _element_text(desc_elem)
+
+            date_elem = found.get('date')
+            if date_elem is not None:
+                listing_data['date'] = _element_text(date_elem)
+
+            address_elem = found.get('address')
+            if address_elem is not None:
+                listing_data['address'] = _element_text(address_elem).replace('Ünvan', '').strip()
+
+            phone_btn = found.get('phone_btn')
+            if phone_btn is not None and phone_btn.get('rel'):
+                listing_data['phone_id'] = phone_btn.get('rel')
+
+            phone_visible = found.get('phone_visible')
+            if phone_visible is not None:
+                phone_match = PHONE_RE.search(_element_text(phone_visible))
+                if phone_match:
+                    listing_data['visible_phone'] = f"({phone_match.group(1)}) {phone_match.group(2)}-{phone_match.group(3)}-{phone_match.group(4)}"
+
+            if listing_data.get('id'):
+                listings.append(Listing.from_dict(listing_data))
+
+        except Exception as e:
+            logger.error(f"Error parsing listing: {str(e)}")
+            continue
+
+    return listings
+
+# Bump when a change to the parsers changes their output, so listings cached
+# in the page cache by an older parser are parsed again
+PARSER_VERSION = 1
+
+PARSER_BACKENDS = {
+    'bs4': parse_listings_from_page,
+    'lxml': parse_listings_from_page_lxml,
+}
+
+def load_known_listings(filename):
+    """Load {listing id: price as int} from a previous CSV output, empty if the file does not exist"""
+    known = {}
+    if not os.path.exists(filename):
+        return known
+    with open(filename, newline='', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            try:
+                known[int(row['id'])] = to_int(row.get('price'))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return known
+
+def merge_into_csv(new_filename, full_filename):
+    """Put the rows of new_filename at the top of full_filename, replacing older rows with the same id"""
+    with open(new_filename, newline='', encoding='utf-8') as csvfile:
+        new_ids = {row['id'] for row in csv.DictReader(csvfile)}
+
+    tmp_filename = f"{full_filename}.tmp"
+    with open(tmp_filename, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.DictWriter(out, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        with open(new_filename, newline='', encoding='utf-8') as csvfile:
+            writer.writerows(csv.DictReader(csvfile))
+        if os.path.exists(full_filename):
+            with open(full_filename, newline='', encoding='utf-8') as csvfile:
+                writer.writerows(row for row in csv.DictReader(csvfile) if row.get('id') not in new_ids)
+    os.replace(tmp_filename, full_filename)
+
 class BinalarScraper:
-    def __init__(self, max_concurrent=50, delay=1):
-        self.base_url = "https://binalar.az"
-        self.phone_api_url = "https://binalar.az/binalar/get_phone/"
+    def __init__(self, max_concurrent=50, delay=1, queue_size=100, parse_workers=0,
+                 parser_backend='bs4', phone_concurrency=10, phone_rate=20.0, phone_in_flight=100,
+                 phone_cache_path=None, phone_cache_ttl=30 * 24 * 3600,
+                 known_listings=None, stop_after_known_pages=2, checkpoint_path=None, resume=False,
+                 min_concurrent=1, max_retries=3, latency_target=5.0, page_cache_dir=None,
+                 request_limiter=None, end_page=None, stop_after_empty_pages=3,
+                 metrics_path=None, metrics_interval=10.0, status_path=None, progress_interval=5.0,
+                 base_url="https://binalar.az", listing_base_url=None):
+        # Overridable so the scraper can run against the local stand-in in replay_server.py
+        self.base_url = base_url.rstrip('/')
+        # Listing URLs are resolved against the site the pages come from, which
+        # differs from base_url when replaying through the stand-in
+        self.listing_base_url = (listing_base_url or base_url).rstrip('/')
+        self.phone_api_url = f"{self.base_url}/binalar/get_phone/"
         self.max_concurrent = max_concurrent
         self.delay = delay
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.queue_size = queue_size
+        # 0 parses on the event loop, a negative value uses one process per CPU core
+        self.parse_workers = os.cpu_count() if parse_workers < 0 else parse_workers
+        self.parse_pool = None
+        self.parser_backend = parser_backend
+        self.parse_func = PARSER_BACKENDS[parser_backend]
+        # max_concurrent is the ceiling; the live limit adapts to latency and errors
+        self.concurrency = AdaptiveConcurrency(max(min_concurrent, max_concurrent // 2), minimum=min_concurrent,
+                                               maximum=max_concurrent, latency_target=latency_target)
+        self.retry_policy = RetryPolicy(max_retries=max_retries)
+        # Optional limiter shared with other processes (anything with async acquire()), taken before every request
+        self.request_limiter = request_limiter
+        # Phone lookups get their own limits instead of one unbounded burst per page
+        self.phone_scheduler = PhoneScheduler(self.fetch_phone_number, max_concurrent=phone_concurrency,
+                                              rate=phone_rate, max_in_flight=phone_in_flight)
+        self.phone_cache_path = phone_cache_path
+        self.phone_cache_ttl = phone_cache_ttl
+        self.phone_cache = None
+        # Incremental mode: {id: price} from the previous run, None crawls everything
+        self.known_listings = known_listings
+        self.stop_after_known_pages = stop_after_known_pages
+        self.known_only_pages = set()
+        self.stop_crawl = None
+        # Last page offset to crawl, None finds it by probing the site
+        self.end_page = end_page
+        self.stop_after_empty_pages = stop_after_empty_pages
+        self.empty_pages = set()
+        # Last page number with listings found by discovery, and whether the
+        # empty-page stop ended the last crawl before reaching it
+        self.last_listing_page = None
+        self.stopped_short = False
+        # Ids already passed to the phone stage in this crawl
+        self.seen_ids = IdSet()
+        self.duplicates_dropped = 0
+        self.checkpoint = CheckpointJournal(checkpoint_path) if checkpoint_path else None
+        self.resume = resume
+        self.page_cache_dir = page_cache_dir
+        self.page_cache = None
+        # Counters and histograms for every stage, exported to metrics_path while crawling
+        self.metrics = PipelineMetrics()
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        # Progress is logged while crawling and, with status_path, written as JSON every progress_interval seconds
+        self.status_path = status_path
+        self.progress_interval = progress_interval
         self.session = None
         self.listings_data = []
+        self.listings_count = 0
 
         # Headers to mimic a real browser
         self.headers = {
@@ -41,246 +384,472 @@ class BinalarScraper:
             connector=connector,
             timeout=timeout
         )
+        if self.parse_workers:
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        if self.phone_cache_path:
+            self.phone_cache = PhoneCache(self.phone_cache_path, ttl=self.phone_cache_ttl)
+        if self.page_cache_dir:
+            self.page_cache = PageCache(self.page_cache_dir)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
-
-    def generate_page_urls(self, start_page=0, end_page=194656, step=32):
+        if self.parse_pool:
+            self.parse_pool.shutdown(cancel_futures=True)
+            self.parse_pool = None
+        if self.phone_cache:
+            self.phone_cache.close()
+            self.phone_cache = None
+        if self.checkpoint:
+            self.checkpoint.close()
+        if self.page_cache:
+            self.page_cache.close()
+            self.page_cache = None
+
+    def generate_page_urls(self, start_page=0, end_page=DEFAULT_END_PAGE, step=32):
         """Generate all page URLs to scrape"""
         urls = [self.base_url]  # First page
         for page in range(step, end_page + 1, step):
             urls.append(f"{self.base_url}/?page={page}")
         return urls
 
+    async def discover_last_page(self, step=32, max_index=1 << 20):
+        """Index of the last page with listings: exponential probing, then binary search on the offset"""
+        async def has_listings(index):
+            url = f"{self.base_url}/?page={index * step}" if index else self.base_url
+            content = await self.fetch_page(url)
+            if content is None:
+                raise RuntimeError(f"could not fetch {url}")
+            return bool(self.parse_listings_from_page(content))
+
+        if not await has_listings(0):
+            return -1
+        # Double until a page comes back empty, so the last full page lies in [low, high)
+        low, high = 0, 1
+        while high < max_index and await has_listings(high):
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if await has_listings(middle):
+                low = middle
+            else:
+                high = middle
+        return low
+
+    async def find_end_page(self, step=32):
+        """end_page for generate_page_urls: the configured one, else probed from the site"""
+        if self.end_page is not None:
+            return self.end_page
+        try:
+            last_page = await self.discover_last_page(step)
+        except RuntimeError as e:
+            logger.warning(f"Last page discovery failed ({e}), crawling up to offset {DEFAULT_END_PAGE}")
+            return DEFAULT_END_PAGE
+        # Ads arriving during the crawl push listings further back; the empty-page stop ends the overshoot
+        end_page = (last_page + self.stop_after_empty_pages) * step
+        self.last_listing_page = last_page + 1
+        logger.info(f"Last page with listings is {last_page + 1}, crawling up to offset {end_page}")
+        return end_page
+
     async def fetch_page(self, url):
-        """Fetch a single page with rate limiting"""
-        async with self.semaphore:
-            try:
-                await asyncio.sleep(self.delay)
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        logger.info(f"Successfully fetched: {url}")
-                        return content
-                    else:
-                        logger.warning(f"Failed to fetch {url}: Status {response.status}")
-                        return None
-            except Exception as e:
-                logger.error(f"Error fetching {url}: {str(e)}")
-                return None
+        """Fetch a single page with adaptive concurrency, retrying transient failures with backoff"""
+        attempts = self.retry_policy.max_retries + 1
+        # With a page cache, ask the server to skip bodies we already have
+        conditional = self.page_cache is not None
+        for attempt in range(attempts):
+            # Politeness delay and backoff are taken outside the concurrency slot
+            await asyncio.sleep(self.delay)
+            if self.request_limiter:
+                await self.request_limiter.acquire()
+            retry_after = None
+            headers = self.page_cache.conditional_headers(url) if conditional else None
+            async with self.concurrency:
+                started = time.monotonic()
+                try:
+                    async with self.session.get(url, headers=headers) as response:
+                        self.metrics.http_responses.inc(status=response.status)
+                        if response.status == 304 and self.page_cache:
+                            self.concurrency.record(True, time.monotonic() - started)
+                            self.metrics.fetch_seconds.observe(time.monotonic() - started)
+                            content = self.page_cache.load(url)
+                            if content is not None:
+                                self.page_cache.mark_not_modified()
+                                logger.debug(f"Not modified: {url}")
+                                return content
+                            # The cached body went missing, ask again for the full page
+                            conditional = False
+                            continue
+
+                        if response.status == 200:
+                            body = await response.read()
+                            content = await response.text()
+                            latency = time.monotonic() - started
+                            self.concurrency.record(True, latency)
+                            self.metrics.fetch_seconds.observe(latency)
+                            self.metrics.fetch_bytes.observe(len(body))
+                            if self.page_cache:
+                                self.page_cache.store(url, content, response.headers.get('ETag'),
+                                                      response.headers.get('Last-Modified'))
+                            logger.debug(f"Successfully fetched: {url}")
+                            return content
+
+                        if response.status not in RETRY_STATUSES:
+                            self.concurrency.record(True, time.monotonic() - started)
+                            self.metrics.pages_failed.inc(stage='fetch')
+                            logger.warning(f"Failed to fetch {url}: Status {response.status}")
+                            return None
+
+                        self.concurrency.record(False)
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        logger.debug(f"Failed to fetch {url}: Status {response.status} (attempt {attempt + 1}/{attempts})")
+                except Exception as e:
+                    self.concurrency.record(False)
+                    self.metrics.fetch_errors.inc()
+                    logger.debug(f"Error fetching {url}: {str(e)} (attempt {attempt + 1}/{attempts})")
+
+            if attempt + 1 < attempts:
+                await asyncio.sleep(self.retry_policy.backoff(attempt, retry_after))
+
+        self.metrics.pages_failed.inc(stage='fetch')
+        logger.error(f"Giving up on {url} after {attempts} attempts")
+        return None
 
     def extract_listing_id_from_url(self, url_path):
         """Extract listing ID from URL path like '/4-otaqli-menzil-kohne-tikili-satilir-montin-nerimanov-35807'"""
-        parts = url_path.strip('/').split('-')
-        if parts:
-            # ID is usually at the end
-            try:
-                return int(parts[-1])
-            except ValueError:
-                return None
-        return None
+        return extract_listing_id_from_url(url_path)
 
     def parse_listings_from_page(self, html_content):
-        """Parse listings from a single page"""
-        soup = BeautifulSoup(html_content, 'lxml')
-        listings = []
-
-        # Find all listing cards
-        listing_cards = soup.find_all('div', class_='card style-6 prop_item')
+        """Parse listings from a single page with the configured parser backend"""
+        return self.parse_func(html_content, self.listing_base_url)
 
-        for card in listing_cards:
+    async def fetch_phone_number(self, listing_id):
+        """Fetch phone number for a specific listing ID
+
+        Transient failures (429, 5xx, timeouts) are retried like page fetches;
+        None means the site answered without a phone, and PhoneLookupError
+        that the request kept failing.
+        """
+        data = {'id': str(listing_id)}
+        headers = {
+            **self.headers,
+            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+            'X-Requested-With': 'XMLHttpRequest',
+            'Origin': self.base_url,
+            'Referer': f'{self.base_url}/',
+        }
+        attempts = self.retry_policy.max_retries + 1
+        error = None
+        for attempt in range(attempts):
+            if self.request_limiter:
+                await self.request_limiter.acquire()
+            retry_after = None
+            started = time.monotonic()
             try:
-                listing_data = {}
-
-                # Extract URL and ID
-                link_elem = card.find('a', href=True)
-                if link_elem:
-                    listing_url = link_elem['href']
-                    listing_data['url'] = urljoin(self.base_url, listing_url)
-                    listing_data['id'] = self.extract_listing_id_from_url(listing_url)
-
-                # Extract price
-                price_elem = card.find('span', class_='text-primary fw-bold')
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    # Remove currency and clean price
-                    price_clean = re.sub(r'[^\d,]', '', price_text).replace(',', '')
-                    listing_data['price'] = price_clean
-                    listing_data['price_raw'] = price_text
-
-                # Extract title and location
-                title_elem = card.find('b', class_='prop_title')
-                if title_elem:
-                    listing_data['title'] = title_elem.get_text(strip=True)
-
-                # Extract details (rooms, area, floor)
-                detail_items = card.find_all('li', class_='d-flex align-items-center flex-fill')
-                for item in detail_items:
-                    text = item.get_text(strip=True)
-                    if 'otaq' in text:
-                        listing_data['rooms'] = re.search(r'(\d+)\s*otaq', text).group(1) if re.search(r'(\d+)\s*otaq', text) else None
-                    elif 'm²' in text or 'm2' in text:
-                        listing_data['area'] = re.search(r'(\d+)\s*m[²2]', text).group(1) if re.search(r'(\d+)\s*m[²2]', text) else None
-                    elif 'mərtəbə' in text:
-                        listing_data['floor'] = text.replace('mərtəbə', '').strip()
-
-                # Extract description
-                desc_elem = card.find('p', class_='short_info')
-                if desc_elem:
-                    listing_data['description'] = desc_elem.get_text(strip=True)
-
-                # Extract date
-                date_elem = card.find('div', class_='col-auto text-end text-body-tertiary')
-                if date_elem:
-                    listing_data['date'] = date_elem.get_text(strip=True)
-
-                # Extract address
-                address_elem = card.find('p', class_='text-body-tertiary mb-0 address')
-                if address_elem:
-                    listing_data['address'] = address_elem.get_text(strip=True).replace('Ünvan', '').strip()
-
-                # Extract phone button ID for API call
-                phone_btn = card.find('div', class_='phone_btn')
-                if phone_btn and phone_btn.get('rel'):
-                    listing_data['phone_id'] = phone_btn['rel']
-
-                # Check for already visible phone numbers
-                phone_visible = card.find('span', class_='text-success')
-                if phone_visible:
-                    phone_text = phone_visible.get_text(strip=True)
-                    # Look for phone patterns
-                    phone_match = re.search(r'\((\d{3})\)\s*(\d{3})-(\d{2})-(\d{2})', phone_text)
-                    if phone_match:
-                        visible_phone = f"({phone_match.group(1)}) {phone_match.group(2)}-{phone_match.group(3)}-{phone_match.group(4)}"
-                        listing_data['visible_phone'] = visible_phone
-
-                if listing_data.get('id'):
-                    listings.append(listing_data)
+                async with self.session.post(self.phone_api_url, data=data, headers=headers) as response:
+                    if response.status == 200:
+                        html_response = await response.text()
+                        self.metrics.phone_seconds.observe(time.monotonic() - started)
+                        # Parse phone number from HTML response
+                        phone_match = PHONE_RE.search(html_response)
+                        if phone_match:
+                            phone_number = f"({phone_match.group(1)}) {phone_match.group(2)}-{phone_match.group(3)}-{phone_match.group(4)}"
+                            return phone_number
+
+                        # Alternative pattern for different formats
+                        phone_match2 = re.search(r'href="tel:(\+994\d+)"', html_response)
+                        if phone_match2:
+                            return phone_match2.group(1)
+                        return None
 
+                    if response.status not in RETRY_STATUSES:
+                        logger.debug(f"No phone for ID {listing_id}: Status {response.status}")
+                        return None
+
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    error = f"Status {response.status}"
             except Exception as e:
-                logger.error(f"Error parsing listing: {str(e)}")
-                continue
+                error = str(e) or type(e).__name__
+            logger.debug(f"Error fetching phone for ID {listing_id}: {error} (attempt {attempt + 1}/{attempts})")
 
-        return listings
+            if attempt + 1 < attempts:
+                await asyncio.sleep(self.retry_policy.backoff(attempt, retry_after))
 
-    async def fetch_phone_number(self, listing_id):
-        """Fetch phone number for a specific listing ID"""
-        try:
-            data = {'id': str(listing_id)}
-            headers = {
-                **self.headers,
-                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                'X-Requested-With': 'XMLHttpRequest',
-                'Origin': self.base_url,
-                'Referer': f'{self.base_url}/',
-            }
-
-            async with self.session.post(self.phone_api_url, data=data, headers=headers) as response:
-                if response.status == 200:
-                    html_response = await response.text()
-                    # Parse phone number from HTML response
-                    phone_match = re.search(r'\((\d{3})\)\s*(\d{3})-(\d{2})-(\d{2})', html_response)
-                    if phone_match:
-                        phone_number = f"({phone_match.group(1)}) {phone_match.group(2)}-{phone_match.group(3)}-{phone_match.group(4)}"
-                        return phone_number
-
-                    # Alternative pattern for different formats
-                    phone_match2 = re.search(r'href="tel:(\+994\d+)"', html_response)
-                    if phone_match2:
-                        return phone_match2.group(1)
-
-                return None
-        except Exception as e:
-            logger.error(f"Error fetching phone for ID {listing_id}: {str(e)}")
-            return None
+        raise PhoneLookupError(f"{error} after {attempts} attempts")
+
+    async def scrape_listings(self, max_pages=None, on_listing=None, first_page=0):
+        """Main scraping method: fetch, parse and phone stages connected by bounded queues
 
-    async def scrape_listings(self, max_pages=None):
-        """Main scraping method"""
+        first_page skips that many pages, so a shard of the crawl can be scraped on its own.
+        """
         logger.info("Starting to scrape listings...")
 
-        # Generate page URLs
-        page_urls = self.generate_page_urls()
+        # Generate page URLs; capped and incremental crawls stop early anyway and skip the probes
+        end_page = self.end_page
+        if end_page is None and not max_pages and self.known_listings is None:
+            end_page = await self.find_end_page()
+        page_urls = self.generate_page_urls(end_page=DEFAULT_END_PAGE if end_page is None else end_page)[first_page:]
         if max_pages:
             page_urls = page_urls[:max_pages]
 
         logger.info(f"Will scrape {len(page_urls)} pages")
 
-        # Fetch all pages concurrently
-        page_contents = await asyncio.gather(*[self.fetch_page(url) for url in page_urls], return_exceptions=True)
-
-        # Parse listings from all pages
-        all_listings = []
-        for i, content in enumerate(page_contents):
-            if content and not isinstance(content, Exception):
-                listings = self.parse_listings_from_page(content)
-                all_listings.extend(listings)
-                logger.info(f"Page {i+1}: Found {len(listings)} listings")
-
-        logger.info(f"Total listings found: {len(all_listings)}")
-
-        # Fetch phone numbers for all listings
-        logger.info("Fetching phone numbers...")
-        phone_tasks = []
-        for listing in all_listings:
-            if listing.get('id'):
-                phone_tasks.append(self.fetch_phone_number(listing['id']))
-
-        phone_numbers = await asyncio.gather(*phone_tasks, return_exceptions=True)
-
-        # Add phone numbers to listings
-        for i, phone in enumerate(phone_numbers):
-            if i < len(all_listings):
-                if phone and not isinstance(phone, Exception):
-                    all_listings[i]['phone'] = phone
-                elif all_listings[i].get('visible_phone'):
-                    # Use visible phone as fallback
-                    all_listings[i]['phone'] = all_listings[i]['visible_phone']
+        # Without a sink, finished listings are collected in memory as before
+        self.listings_data = []
+        self.listings_count = 0
+        if on_listing is None:
+            on_listing = self.listings_data.append
+
+        self.known_only_pages = set()
+        self.empty_pages = set()
+        self.stopped_short = False
+        self.stop_crawl = asyncio.Event()
+
+        # A page holds at most 32 cards, so the listing queue is sized in pages too
+        page_queue = asyncio.Queue(maxsize=self.queue_size)
+        listing_queue = asyncio.Queue(maxsize=self.queue_size * 32)
+
+        # Resuming replays the checkpoint and skips the pages it already covers
+        done_pages, replay_pages, replay_phones = set(), [], {}
+        if self.checkpoint:
+            if self.resume:
+                done_pages, replay_pages, replay_phones = self.checkpoint.load()
+            self.checkpoint.open(resume=self.resume)
+        self.seen_ids = IdSet(listing['id'] for listings in replay_pages for listing in listings)
+        self.duplicates_dropped = 0
+
+        # Fetch workers share one iterator, so every page is handed out exactly once
+        url_iter = ((page_number, url) for page_number, url in enumerate(page_urls, start=first_page + 1)
+                    if url not in done_pages)
+        fetchers = [asyncio.create_task(self._fetch_stage(url_iter, page_queue))
+                    for _ in range(self.max_concurrent)]
+        parsers = [asyncio.create_task(self._parse_stage(page_queue, listing_queue))
+                   for _ in range(max(self.parse_workers, 1))]
+        if replay_pages:
+            parsers.append(asyncio.create_task(
+                self._replay_checkpoint(replay_pages, replay_phones, listing_queue, on_listing)))
+        phone_workers = [asyncio.create_task(self._phone_stage(listing_queue, on_listing))
+                         for _ in range(self.phone_scheduler.max_in_flight)]
+        workers = fetchers + parsers + phone_workers
+
+        metrics = self.metrics
+        metrics.gauge('page_queue_depth', 'Fetched pages waiting to be parsed', page_queue.qsize)
+        metrics.gauge('listing_queue_depth', 'Parsed listings waiting for the phone stage', listing_queue.qsize)
+        metrics.gauge('phone_queue_depth', 'Phone lookups waiting for a slot or token',
+                      lambda: self.phone_scheduler.queue_depth)
+        metrics.gauge('concurrency_limit', 'Current adaptive page concurrency limit', lambda: int(self.concurrency.limit))
+        metrics.gauge('listings_done', 'Listings handed to the sink', lambda: self.listings_count)
+        metrics.gauge('duplicates_dropped', 'Listings skipped as already seen in this crawl',
+                      lambda: self.duplicates_dropped)
+        if self.phone_cache:
+            metrics.gauge('phone_cache_hit_rate', 'Share of phone cache reads that hit',
+                          lambda: self.phone_cache.stats()['hit_rate'])
+        exporter = None
+        if self.metrics_path:
+            exporter = asyncio.create_task(metrics.export_periodically(self.metrics_path, self.metrics_interval))
+        progress = ProgressReporter(self, sum(1 for url in page_urls if url not in done_pages),
+                                    status_path=self.status_path, interval=self.progress_interval)
+        reporter = asyncio.create_task(progress.run())
+
+        state = 'failed'
+        try:
+            await asyncio.gather(
+                *workers,
+                self._close_stage(fetchers, page_queue, len(parsers)),
+                self._close_stage(parsers, listing_queue, len(phone_workers)),
+            )
+            state = 'finished'
+        finally:
+            for task in workers:
+                task.cancel()
+            reporter.cancel()
+            progress.finish(state)
+            if exporter:
+                exporter.cancel()
+                metrics.write(self.metrics_path)
+
+        if self.checkpoint:
+            self.checkpoint.flush()
+        if self.page_cache:
+            self.page_cache.flush()
+            logger.info(f"Page cache: {self.page_cache.stats()}")
+
+        logger.info(f"Total listings found: {self.listings_count}")
+        logger.info(f"Duplicate listings dropped: {self.duplicates_dropped}")
+        logger.info(f"Phone lookups: {self.phone_scheduler.stats()}")
+        if self.phone_cache:
+            self.phone_cache.flush()
+            logger.info(f"Phone cache: {self.phone_cache.stats()}")
+        return self.listings_data
+
+    async def _close_stage(self, workers, queue, consumers):
+        """Wait for a stage to finish, then tell every consumer of its queue to stop"""
+        await asyncio.gather(*workers)
+        for _ in range(consumers):
+            await queue.put(None)
+
+    async def _fetch_stage(self, url_iter, page_queue):
+        """Fetch pages and pass their HTML to the parse stage"""
+        for page_number, url in url_iter:
+            if self.stop_crawl.is_set():
+                break
+            content = await self.fetch_page(url)
+            if content:
+                await page_queue.put((page_number, url, content))
+
+    async def _parse_stage(self, page_queue, listing_queue):
+        """Parse fetched pages and pass each listing to the phone stage"""
+        while True:
+            item = await page_queue.get()
+            if item is None:
+                break
+
+            page_number, url, content = item
+            started = time.monotonic()
+            try:
+                # An unchanged body reuses the listings parsed from it last time
+                cache_key = (self.parser_backend, PARSER_VERSION, self.listing_base_url)
+                cached = self.page_cache.cached_listings(content, *cache_key) if self.page_cache else None
+                if cached is not None:
+                    listings = [Listing.from_dict(data) for data in cached]
+                    self.metrics.pages_parsed.inc(source='cache')
+                else:
+                    if self.parse_pool:
+                        # Parse in a worker process so the event loop keeps servicing sockets
+                        listings = await asyncio.get_running_loop().run_in_executor(
+                            self.parse_pool, self.parse_func, content, self.listing_base_url)
+                    else:
+                        listings = self.parse_listings_from_page(content)
+                    if self.page_cache:
+                        self.page_cache.store_listings(content, *cache_key,
+                                                       [listing.to_dict() for listing in listings])
+                    self.metrics.pages_parsed.inc(source='parsed')
+            except Exception as e:
+                # Counted as failed so a crawl that lost pages is not taken for a complete one
+                self.metrics.pages_failed.inc(stage='parse')
+                logger.error(f"Error parsing page {page_number}: {str(e)}")
+                continue
 
-        self.listings_data = all_listings
-        return all_listings
+            self.metrics.parse_seconds.observe(time.monotonic() - started)
+            self.metrics.cards_per_page.observe(len(listings))
+            logger.debug(f"Page {page_number}: Found {len(listings)} listings")
+            if not listings:
+                self._note_empty(page_number)
+            if self.known_listings is not None:
+                listings = self._filter_known(page_number, listings)
+            # New ads push older ones down the offset-based pages while we crawl,
+            # so the same listing can show up again on the next page
+            unique = [listing for listing in listings if self.seen_ids.add(listing.id)]
+            self.duplicates_dropped += len(listings) - len(unique)
+            listings = unique
+            if self.checkpoint:
+                self.checkpoint.record_page(url, [listing.to_dict() for listing in listings])
+            for listing in listings:
+                await listing_queue.put(listing)
+
+    async def _replay_checkpoint(self, pages, phones, listing_queue, on_listing):
+        """Emit listings finished before the restart and send the rest back to the phone stage"""
+        for listings in pages:
+            for data in listings:
+                listing = Listing.from_dict(data)
+                if listing.id in phones:
+                    if phones[listing.id]:
+                        listing.phone = phones[listing.id]
+                    on_listing(listing)
+                    self.listings_count += 1
+                else:
+                    await listing_queue.put(listing)
+
+    @staticmethod
+    def _page_run(pages, page_number):
+        """(first, last) of the run of consecutive page numbers in `pages` around page_number"""
+        # Pages finish out of order, so the run can grow in both directions
+        first = last = page_number
+        while first - 1 in pages:
+            first -= 1
+        while last + 1 in pages:
+            last += 1
+        return first, last
+
+    def _note_empty(self, page_number):
+        """Stop the crawl once a run of pages comes back without listings: the catalog has ended"""
+        self.empty_pages.add(page_number)
+        first, last = self._page_run(self.empty_pages, page_number)
+        if last - first + 1 >= self.stop_after_empty_pages and not self.stop_crawl.is_set():
+            if self.last_listing_page is not None and first <= self.last_listing_page:
+                # Empty 200 responses (e.g. a challenge page) well before the end found by discovery
+                self.stopped_short = True
+                logger.warning(f"Pages {first}-{last} are empty but discovery found listings up to page "
+                               f"{self.last_listing_page}, stopping")
+            else:
+                logger.info(f"Pages {first}-{last} are empty, stopping at the end of the catalog")
+            self.stop_crawl.set()
+
+    def _filter_known(self, page_number, listings):
+        """Keep new or re-priced listings and stop the crawl after a run of already-seen pages"""
+        if all(listing.id in self.known_listings for listing in listings):
+            self.known_only_pages.add(page_number)
+            first, last = self._page_run(self.known_only_pages, page_number)
+            if last - first + 1 >= self.stop_after_known_pages and not self.stop_crawl.is_set():
+                logger.info(f"Pages {first}-{last} only contain known listings, stopping incremental crawl")
+                self.stop_crawl.set()
+
+        return [listing for listing in listings
+                if listing.id not in self.known_listings or self.known_listings[listing.id] != listing.price]
+
+    async def _phone_stage(self, listing_queue, on_listing):
+        """Resolve phone numbers and hand finished listings to the sink"""
+        while True:
+            listing = await listing_queue.get()
+            if listing is None:
+                break
+
+            # A phone already shown on the card or cached from an earlier run needs no request
+            phone = listing.visible_phone
+            source = 'card'
+            if not phone and self.phone_cache:
+                phone = self.phone_cache.get(listing.id)
+                source = 'cache'
+            lookup_failed = False
+            if not phone:
+                source = 'lookup'
+                try:
+                    phone = await self.phone_scheduler.resolve(listing.id)
+                except PhoneLookupError:
+                    lookup_failed = True
+                if phone and self.phone_cache:
+                    self.phone_cache.put(listing.id, phone)
+            if phone:
+                listing.phone = phone
+            self.metrics.phone_sources.inc(source='failed' if lookup_failed else source if phone else 'none')
+
+            on_listing(listing)
+            self.listings_count += 1
+            # A listing whose lookup failed stays unfinished, so --resume asks again
+            if self.checkpoint and not lookup_failed:
+                self.checkpoint.record_phone(listing.id, listing.phone)
 
     def save_to_csv(self, filename='binalar_listings.csv'):
-        """Save listings to CSV file"""
-        if not self.listings_data:
-            logger.warning("No data to save")
-            return
-
-        fieldnames = ['phone', 'id', 'title', 'price', 'price_raw', 'rooms', 'area', 'floor',
-                     'description', 'date', 'address', 'visible_phone', 'phone_id', 'url']
-
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for listing in self.listings_data:
-                # Ensure all fields are present
-                row = {field: listing.get(field, '') for field in fieldnames}
-                writer.writerow(row)
-
-        logger.info(f"Data saved to {filename}")
+        """Save collected listings to CSV file"""
+        self._save(CsvSink, filename)
 
     def save_to_xlsx(self, filename='binalar_listings.xlsx'):
-        """Save listings to Excel file"""
+        """Save collected listings to Excel file"""
+        self._save(XlsxSink, filename)
+
+    def _save(self, sink_class, filename):
         if not self.listings_data:
             logger.warning("No data to save")
             return
 
-        df = pd.DataFrame(self.listings_data)
-
-        # Reorder columns for better readability
-        column_order = ['phone', 'id', 'title', 'price', 'price_raw', 'rooms', 'area', 'floor',
-                       'description', 'date', 'address', 'visible_phone', 'phone_id', 'url']
-
-        # Only include columns that exist in the dataframe
-        existing_columns = [col for col in column_order if col in df.columns]
-        df = df[existing_columns]
-
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Listings', index=False)
-
-        logger.info(f"Data saved to {filename}")
+        sink = sink_class(filename)
+        try:
+            for listing in self.listings_data:
+                sink.write(listing)
+        except BaseException:
+            sink.abort()
+            raise
+        sink.close()
 
 async def main():
     """Main function to run the scraper"""
@@ -288,35 +857,126 @@ async def main():
 
     parser = argparse.ArgumentParser(description='Scrape listings from binalar.az')
     parser.add_argument('--max-pages', type=int, default=None, help='Maximum number of pages to scrape (default: all pages)')
-    parser.add_argument('--max-concurrent', type=int, default=10, help='Maximum concurrent requests (default: 10)')
+    parser.add_argument('--end-page', type=int, default=None, help='Last page offset to crawl (default: found by probing the site)')
+    parser.add_argument('--stop-after-empty-pages', type=int, default=3, help='Consecutive empty pages that end the crawl (default: 3)')
+    parser.add_argument('--max-concurrent', type=int, default=10, help='Maximum concurrent page requests, the ceiling for the adaptive limit (default: 10)')
+    parser.add_argument('--min-concurrent', type=int, default=1, help='Lowest concurrency the adaptive limit backs off to (default: 1)')
+    parser.add_argument('--max-retries', type=int, default=3, help='Retries for pages failing with 429/5xx or network errors (default: 3)')
+    parser.add_argument('--latency-target', type=float, default=5.0, help='Page latency in seconds above which concurrency is reduced (default: 5.0)')
     parser.add_argument('--delay', type=float, default=1.0, help='Delay between requests in seconds (default: 1.0)')
+    parser.add_argument('--queue-size', type=int, default=100, help='Pages buffered between the fetch and parse stages (default: 100)')
+    parser.add_argument('--parse-workers', type=int, default=0, help='Worker processes for HTML parsing, 0 parses on the event loop and -1 uses all CPU cores (default: 0)')
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default='bs4', help='HTML parser backend (default: bs4)')
+    parser.add_argument('--phone-concurrency', type=int, default=10, help='Maximum concurrent phone lookups (default: 10)')
+    parser.add_argument('--phone-rate', type=float, default=20.0, help='Phone lookups per second, 0 for no limit (default: 20)')
+    parser.add_argument('--phone-in-flight', type=int, default=100, help='Listings waiting on phone lookups at once (default: 100)')
+    parser.add_argument('--phone-cache', type=str, default='phone_cache.sqlite', help='SQLite file caching phone numbers between runs, empty to disable (default: phone_cache.sqlite)')
+    parser.add_argument('--phone-cache-ttl', type=float, default=30, help='Days before a cached phone number is fetched again (default: 30)')
+    parser.add_argument('--incremental', action='store_true', help='Only collect listings that are new or re-priced since the previous output, stopping at already-seen pages')
+    parser.add_argument('--stop-after-known-pages', type=int, default=2, help='Consecutive already-seen pages that end an incremental crawl (default: 2)')
+    parser.add_argument('--checkpoint', type=str, default=None, help='Checkpoint journal of finished pages and phone lookups (default: <output>.checkpoint.jsonl)')
+    parser.add_argument('--resume', action='store_true', help='Resume from the checkpoint journal instead of starting over')
+    parser.add_argument('--page-cache', type=str, default=None, help='Directory for raw pages, sending conditional requests and skipping parses of unchanged pages (default: disabled)')
+    parser.add_argument('--base-url', type=str, default='https://binalar.az', help='Site to scrape, e.g. a running replay_server.py (default: https://binalar.az)')
+    parser.add_argument('--replay', type=str, default=None, help='Replay a recorded --page-cache directory through a local stand-in server instead of the live site')
+    parser.add_argument('--parquet', type=str, default=None, help='Also write a typed Parquet dataset partitioned by scrape date under this directory')
+    parser.add_argument('--store', type=str, default=None, help='SQLite listing store to upsert into, keeping first/last seen times and price history')
+    parser.add_argument('--metrics', type=str, default=None, help='File rewritten during the crawl with metrics: Prometheus text for .prom, JSON otherwise (default: disabled)')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='Seconds between metrics file updates (default: 10)')
+    parser.add_argument('--status-file', type=str, default=None, help='JSON status file with progress, rates and ETA, rewritten while crawling (default: disabled)')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Seconds between status file updates (default: 5)')
     parser.add_argument('--output', type=str, default='binalar_listings', help='Output filename prefix (default: binalar_listings)')
 
     args = parser.parse_args()
 
-    async with BinalarScraper(max_concurrent=args.max_concurrent, delay=args.delay) as scraper:
-        logger.info(f"Starting scraper with max_concurrent={args.max_concurrent}, delay={args.delay}")
-
-        if args.max_pages:
-            logger.info(f"Will scrape maximum {args.max_pages} pages")
-        else:
-            logger.info("Will scrape all pages (this may take several hours)")
-
-        listings = await scraper.scrape_listings(max_pages=args.max_pages)
-
-        if listings:
-            logger.info(f"Successfully scraped {len(listings)} listings")
-
-            # Save to both CSV and XLSX with custom filename
-            csv_file = f"{args.output}.csv"
-            xlsx_file = f"{args.output}.xlsx"
-
-            scraper.save_to_csv(csv_file)
-            scraper.save_to_xlsx(xlsx_file)
-
-            logger.info(f"Results saved to {csv_file} and {xlsx_file}")
-        else:
-            logger.warning("No listings were scraped")
+    replay_runner = None
+    base_url = args.base_url
+    if args.replay:
+        # Pages are looked up under the --base-url they were recorded from
+        from replay_server import create_app, start_server
+        replay_runner, base_url = await start_server(
+            create_app(page_cache_dir=args.replay, source_base_url=args.base_url.rstrip('/')))
+        # Phones from the stand-in are fake, keep them out of the real cache
+        args.phone_cache = None
+        logger.info(f"Replaying {args.replay} via {base_url}")
+
+    known_listings = None
+    if args.incremental:
+        known_listings = load_known_listings(f"{args.output}.csv")
+        logger.info(f"Incremental mode: {len(known_listings)} known listings in {args.output}.csv")
+
+    try:
+        async with BinalarScraper(max_concurrent=args.max_concurrent, delay=args.delay,
+                                  queue_size=args.queue_size, parse_workers=args.parse_workers,
+                                  parser_backend=args.parser, phone_concurrency=args.phone_concurrency,
+                                  phone_rate=args.phone_rate, phone_in_flight=args.phone_in_flight,
+                                  phone_cache_path=args.phone_cache or None,
+                                  phone_cache_ttl=args.phone_cache_ttl * 24 * 3600,
+                                  known_listings=known_listings,
+                                  stop_after_known_pages=args.stop_after_known_pages,
+                                  checkpoint_path=args.checkpoint or f"{args.output}.checkpoint.jsonl",
+                                  resume=args.resume, min_concurrent=args.min_concurrent,
+                                  max_retries=args.max_retries, latency_target=args.latency_target,
+                                  page_cache_dir=args.page_cache, end_page=args.end_page,
+                                  stop_after_empty_pages=args.stop_after_empty_pages,
+                                  metrics_path=args.metrics, metrics_interval=args.metrics_interval,
+                                  status_path=args.status_file, progress_interval=args.progress_interval,
+                                  base_url=base_url, listing_base_url=args.base_url) as scraper:
+            logger.info(f"Starting scraper with max_concurrent={args.max_concurrent}, delay={args.delay}")
+
+            if args.max_pages:
+                logger.info(f"Will scrape maximum {args.max_pages} pages")
+            elif args.incremental:
+                logger.info("Will scrape until already-seen pages are reached")
+            else:
+                logger.info("Will scrape all pages (this may take several hours)")
+
+            # Stream to both CSV and XLSX with custom filename as listings finish;
+            # incremental runs write only the new listings and fold them into the full CSV
+            output = f"{args.output}_new" if args.incremental else args.output
+            csv_file = f"{output}.csv"
+            xlsx_file = f"{output}.xlsx"
+
+            sinks = [CsvSink(csv_file), XlsxSink(xlsx_file)]
+            if args.parquet:
+                # A complete crawl replaces the day's partition; partial runs add to it
+                sinks.append(ParquetSink(args.parquet, replace_partition=not args.max_pages and not args.incremental))
+            store = ListingStore(args.store) if args.store else None
+            if store:
+                sinks.append(store)
+            sink = MultiSink(sinks)
+            try:
+                await scraper.scrape_listings(max_pages=args.max_pages, on_listing=sink.write)
+                # Only a complete crawl can tell that a listing is gone
+                if store and not args.max_pages and not args.incremental:
+                    failed_pages = scraper.metrics.pages_failed.total()
+                    if failed_pages:
+                        logger.warning(f"Not marking removed listings: {failed_pages} pages could not be fetched or parsed")
+                    elif scraper.stopped_short:
+                        logger.warning("Not marking removed listings: the crawl stopped before the last page with listings")
+                    else:
+                        store.mark_missing_as_removed()
+            except BaseException:
+                # Leave the previous output files in place
+                sink.abort()
+                raise
+            if scraper.listings_count:
+                sink.close()
+            else:
+                sink.abort()
+
+            if scraper.listings_count:
+                logger.info(f"Successfully scraped {scraper.listings_count} listings")
+                logger.info(f"Results saved to {csv_file} and {xlsx_file}")
+
+                if args.incremental:
+                    merge_into_csv(csv_file, f"{args.output}.csv")
+                    logger.info(f"Merged new listings into {args.output}.csv")
+            else:
+                logger.warning("No listings were scraped")
+    finally:
+        if replay_runner:
+            await replay_runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,194 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 4, 8, 16, 24, 32, 48, 64)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in key) + '}'
+
+class Counter:
+    """Monotonic count, optionally split by labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self):
+        return sum(self.values.values())
+
+    def prometheus_lines(self):
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in sorted(self.values.items())]
+
+    def snapshot(self):
+        if list(self.values) in ([], [()]):
+            return self.values.get((), 0)
+        return {','.join(f"{name}={value}" for name, value in key): count
+                for key, count in sorted(self.values.items())}
+
+class Gauge:
+    """Current value read from a callable when exported"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, func):
+        self.name = name
+        self.help = help_text
+        self.func = func
+
+    def prometheus_lines(self):
+        return [f"{self.name} {self.func()}"]
+
+    def snapshot(self):
+        return self.func()
+
+class Histogram:
+    """Distribution of observed values over fixed bucket bounds"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(buckets)
+        # One slot per bound plus the +Inf overflow
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, None when empty"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def prometheus_lines(self):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+        }
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms for one crawl, exported as Prometheus text or JSON"""
+
+    def __init__(self, prefix='binalar_'):
+        self.prefix = prefix
+        self.metrics = {}
+        self.started = time.time()
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter(self.prefix + name, help_text))
+
+    def gauge(self, name, help_text, func):
+        """Register (or replace) a gauge reading func() at export time"""
+        return self._register(Gauge(self.prefix + name, help_text, func))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self.prefix + name, help_text, buckets))
+
+    def value(self, name):
+        """Current snapshot value of one metric, by name without the prefix (None if unregistered)"""
+        metric = self.metrics.get(self.prefix + name)
+        return metric.snapshot() if metric else None
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """JSON-friendly view of every metric, keyed without the prefix"""
+        return {
+            'timestamp': time.time(),
+            'uptime_s': round(time.time() - self.started, 3),
+            'metrics': {name[len(self.prefix):]: metric.snapshot() for name, metric in self.metrics.items()},
+        }
+
+    def write(self, path):
+        """Write Prometheus text for .prom/.txt paths, a JSON snapshot otherwise, replacing the file atomically"""
+        if path.endswith(('.prom', '.txt')):
+            body = self.to_prometheus()
+        else:
+            body = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    async def export_periodically(self, path, interval=10.0):
+        """Rewrite the export file every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.write(path)
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {path}: {e}")
+
+class PipelineMetrics(MetricsRegistry):
+    """The scraper's metrics: fetch, parse and phone stages plus queue depth gauges"""
+
+    def __init__(self, prefix='binalar_'):
+        super().__init__(prefix)
+        self.fetch_seconds = self.histogram('fetch_seconds', 'Page request latency in seconds')
+        self.fetch_bytes = self.histogram('fetch_bytes', 'Page body size in bytes', BYTES_BUCKETS)
+        self.http_responses = self.counter('http_responses_total', 'Page responses by status code')
+        self.fetch_errors = self.counter('fetch_errors_total', 'Page requests that failed without a response')
+        self.pages_failed = self.counter('pages_failed_total', 'Pages lost after any retries, by stage (fetch or parse)')
+        self.pages_parsed = self.counter('pages_parsed_total', 'Pages parsed, by source (parsed or cache)')
+        self.parse_seconds = self.histogram('parse_seconds', 'Time to turn one page into listings')
+        self.cards_per_page = self.histogram('cards_per_page', 'Listings found per page', COUNT_BUCKETS)
+        self.phone_seconds = self.histogram('phone_lookup_seconds', 'Phone API request latency in seconds')
+        self.phone_sources = self.counter('phone_sources_total', 'Finished listings by phone source (card, cache, lookup, none, failed)')
@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PageCache:
+    """Content-addressed store of raw pages with their validators and parsed listings
+
+    Bodies are gzipped under objects/<aa>/<sha256>.html.gz and parsed listings
+    under a digest of the body plus the parser that produced them, so an
+    unchanged page is never parsed twice by the same parser. An SQLite index
+    maps each URL to its latest digest, ETag and Last-Modified.
+    """
+
+    def __init__(self, directory='page_cache', commit_every=50):
+        self.directory = directory
+        self.commit_every = commit_every
+        self.pending_writes = 0
+
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.parse_hits = 0
+
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.sqlite'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'url TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def digest(content):
+        """SHA-256 of a page body"""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _object_path(self, digest, suffix):
+        return os.path.join(self.directory, 'objects', digest[:2], f"{digest}{suffix}")
+
+    def _entry(self, url):
+        return self.conn.execute(
+            'SELECT digest, etag, last_modified FROM pages WHERE url = ?', (url,)
+        ).fetchone()
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a URL fetched before"""
+        entry = self._entry(url)
+        if entry is None or not os.path.exists(self._object_path(entry[0], '.html.gz')):
+            return {}
+        headers = {}
+        if entry[1]:
+            headers['If-None-Match'] = entry[1]
+        if entry[2]:
+            headers['If-Modified-Since'] = entry[2]
+        return headers
+
+    def load(self, url):
+        """Latest stored body for a URL, or None"""
+        entry = self._entry(url)
+        if entry is None:
+            return None
+        path = self._object_path(entry[0], '.html.gz')
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def mark_not_modified(self):
+        """Count a 304 response for a cached URL"""
+        self.not_modified += 1
+
+    def store(self, url, content, etag=None, last_modified=None):
+        """Store a freshly downloaded body and its validators"""
+        digest = self.digest(content)
+        entry = self._entry(url)
+        if entry is not None and entry[0] == digest:
+            self.unchanged += 1
+        else:
+            self.changed += 1
+
+        path = self._object_path(digest, '.html.gz')
+        if not os.path.exists(path):
+            self._write_object(path, content)
+
+        self.conn.execute(
+            'INSERT OR REPLACE INTO pages (url, digest, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)',
+            (url, digest, etag, last_modified, time.time())
+        )
+        self.pending_writes += 1
+        if self.pending_writes >= self.commit_every:
+            self.flush()
+
+    def listings_digest(self, content, parser_backend, parser_version, base_url):
+        """Key for listings parsed from a body by a given parser backend and version against base_url"""
+        key = '\0'.join([self.digest(content), parser_backend, str(parser_version), base_url])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def cached_listings(self, content, parser_backend, parser_version, base_url):
+        """Listings previously parsed from an identical body by the same parser, or None"""
+        path = self._object_path(self.listings_digest(content, parser_backend, parser_version, base_url),
+                                 '.listings.json.gz')
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            listings = json.load(f)
+        self.parse_hits += 1
+        return listings
+
+    def store_listings(self, content, parser_backend, parser_version, base_url, listings):
+        """Remember the listings a parser produced from a body"""
+        path = self._object_path(self.listings_digest(content, parser_backend, parser_version, base_url),
+                                 '.listings.json.gz')
+        self._write_object(path, json.dumps(listings, ensure_ascii=False))
+
+    def _write_object(self, path, text):
+        # Write to a temporary name first so a crash never leaves a truncated object
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        """Commit pending index writes"""
+        if self.pending_writes:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        """Commit pending index writes and close the index"""
+        self.flush()
+        self.conn.close()
+
+    def stats(self):
+        """Snapshot of the cache counters"""
+        return {
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'changed': self.changed,
+            'parse_hits': self.parse_hits,
+        }
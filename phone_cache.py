@@ -0,0 +1,77 @@
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PhoneCache:
+    """SQLite-backed phone numbers keyed by listing id, expiring after `ttl` seconds"""
+
+    def __init__(self, path='phone_cache.sqlite', ttl=30 * 24 * 3600, commit_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.commit_every = commit_every
+        self.pending_writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS phones ('
+            'listing_id INTEGER PRIMARY KEY, phone TEXT NOT NULL, fetched_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+
+    def get(self, listing_id):
+        """Return the cached phone for a listing, or None if missing or expired"""
+        row = self.conn.execute(
+            'SELECT phone, fetched_at FROM phones WHERE listing_id = ?', (int(listing_id),)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        phone, fetched_at = row
+        if self.ttl and time.time() - fetched_at > self.ttl:
+            self.expired += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return phone
+
+    def put(self, listing_id, phone):
+        """Store a phone number, committing in batches"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO phones (listing_id, phone, fetched_at) VALUES (?, ?, ?)',
+            (int(listing_id), phone, time.time())
+        )
+        self.stores += 1
+        self.pending_writes += 1
+        if self.pending_writes >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """Commit pending writes"""
+        if self.pending_writes:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        """Commit pending writes and close the database"""
+        self.flush()
+        self.conn.close()
+
+    def stats(self):
+        """Snapshot of the cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'stores': self.stores,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,105 @@
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate or 0, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        # The lock queues waiters so tokens are handed out in arrival order
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it (no-op when rate is 0/None)"""
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class PhoneLookupError(Exception):
+    """A phone request that failed after its retries, as opposed to a response without a phone"""
+
+class PhoneScheduler:
+    """Run phone lookups under their own concurrency limit, request rate and in-flight cap"""
+
+    def __init__(self, lookup, max_concurrent=10, rate=20.0, max_in_flight=100):
+        self.lookup = lookup
+        self.max_concurrent = max_concurrent
+        self.max_in_flight = max_in_flight
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight_slots = asyncio.Semaphore(max_in_flight)
+        self.bucket = TokenBucket(rate)
+
+        self.submitted = 0
+        self.succeeded = 0
+        self.no_phone = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.active = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self):
+        """Lookups admitted but still waiting for a connection slot or a token"""
+        return self.in_flight - self.active
+
+    async def resolve(self, listing_id):
+        """Look up the phone for a listing, waiting for capacity first
+
+        Returns None when the response holds no phone and raises
+        PhoneLookupError when the request itself failed.
+        """
+        async with self.in_flight_slots:
+            self.submitted += 1
+            self.in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            try:
+                async with self.semaphore:
+                    await self.bucket.acquire()
+                    self.active += 1
+                    try:
+                        phone = await self.lookup(listing_id)
+                    except Exception as e:
+                        self.failed += 1
+                        logger.error(f"Phone lookup failed for ID {listing_id}: {str(e)}")
+                        if isinstance(e, PhoneLookupError):
+                            raise
+                        raise PhoneLookupError(str(e)) from e
+                    finally:
+                        self.active -= 1
+            finally:
+                self.in_flight -= 1
+
+        if phone:
+            self.succeeded += 1
+        else:
+            self.no_phone += 1
+        return phone
+
+    def stats(self):
+        """Snapshot of the scheduler counters"""
+        completed = self.succeeded + self.no_phone + self.failed
+        return {
+            'submitted': self.submitted,
+            'succeeded': self.succeeded,
+            'no_phone': self.no_phone,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'success_rate': self.succeeded / completed if completed else 0.0,
+        }
@@ -0,0 +1,141 @@
+import asyncio
+import collections
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+def format_duration(seconds):
+    """1h05m / 4m10s / 12s"""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+class ProgressReporter:
+    """Progress, throughput and ETA of a running crawl, logged and written to a status file
+
+    Rates are averaged over the last `window` seconds so the ETA follows the
+    current speed rather than the start-up phase. The status file is rewritten
+    every `interval` seconds; a scheduler can treat an old updated_at or a large
+    seconds_since_progress as a stalled run.
+    """
+
+    def __init__(self, scraper, total_pages, status_path=None, interval=5.0, log_interval=30.0, window=300.0):
+        self.scraper = scraper
+        self.total_pages = total_pages
+        self.status_path = status_path
+        self.interval = interval
+        self.log_interval = log_interval
+        self.window = window
+
+        metrics = scraper.metrics
+        # Metrics are cumulative over the scraper's lifetime; progress counts from here
+        self.base_pages = metrics.pages_parsed.total() + metrics.pages_failed.total()
+        self.base_listings = scraper.listings_count
+        self.started = time.time()
+        self.last_logged = self.started
+        self.last_progress = self.started
+        self.samples = collections.deque([(self.started, 0, 0)])
+
+    def pages_done(self):
+        metrics = self.scraper.metrics
+        return metrics.pages_parsed.total() + metrics.pages_failed.total() - self.base_pages
+
+    def error_rate(self):
+        """Share of page requests answered with an error status or failing outright"""
+        metrics = self.scraper.metrics
+        responses = metrics.http_responses.values
+        total = sum(responses.values()) + metrics.fetch_errors.total()
+        ok = sum(count for key, count in responses.items() if dict(key).get('status') in (200, 304))
+        return (total - ok) / total if total else 0.0
+
+    def status(self, state='running'):
+        """Machine-readable snapshot of the crawl"""
+        now = time.time()
+        pages = self.pages_done()
+        listings = self.scraper.listings_count - self.base_listings
+        if (pages, listings) != self.samples[-1][1:]:
+            self.last_progress = now
+        self.samples.append((now, pages, listings))
+        while len(self.samples) > 2 and self.samples[0][0] < now - self.window:
+            self.samples.popleft()
+
+        first_time, first_pages, first_listings = self.samples[0]
+        span = now - first_time
+        pages_per_s = (pages - first_pages) / span if span > 0 else 0.0
+        listings_per_s = (listings - first_listings) / span if span > 0 else 0.0
+        # Phone lookups lag behind parsing, so the slower of the two estimates wins
+        remaining_pages = max(self.total_pages - pages, 0)
+        cards = self.scraper.metrics.cards_per_page
+        expected_listings = cards.sum / cards.count * self.total_pages if cards.count else 0
+        remaining_listings = max(expected_listings - listings - self.scraper.duplicates_dropped, 0)
+        estimates = []
+        if pages_per_s > 0:
+            estimates.append(remaining_pages / pages_per_s)
+        if listings_per_s > 0:
+            estimates.append(remaining_listings / listings_per_s)
+        eta = max(estimates) if estimates else None
+
+        scheduler = self.scraper.phone_scheduler
+        phones_pending = (self.scraper.metrics.value('listing_queue_depth') or 0) + scheduler.in_flight
+        return {
+            'state': state,
+            'pid': os.getpid(),
+            'started_at': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'updated_at': datetime.fromtimestamp(now).isoformat(timespec='seconds'),
+            'elapsed_s': round(now - self.started, 1),
+            'pages_done': pages,
+            'pages_total': self.total_pages,
+            'percent': round(100 * pages / self.total_pages, 2) if self.total_pages else 100.0,
+            'listings': listings,
+            'pages_per_s': round(pages_per_s, 3),
+            'listings_per_s': round(listings_per_s, 3),
+            'phones_pending': phones_pending,
+            'error_rate': round(self.error_rate(), 4),
+            'eta_s': round(eta) if eta is not None else None,
+            'eta_at': datetime.fromtimestamp(now + eta).isoformat(timespec='seconds') if eta is not None else None,
+            'stopping_early': bool(self.scraper.stop_crawl and self.scraper.stop_crawl.is_set()),
+            'last_progress_at': datetime.fromtimestamp(self.last_progress).isoformat(timespec='seconds'),
+            'seconds_since_progress': round(now - self.last_progress, 1),
+        }
+
+    def write(self, status):
+        if not self.status_path:
+            return
+        tmp_path = f"{self.status_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(status, f, indent=2)
+            os.replace(tmp_path, self.status_path)
+        except OSError as e:
+            logger.warning(f"Could not write status to {self.status_path}: {e}")
+
+    def log(self, status):
+        eta = format_duration(status['eta_s']) if status['eta_s'] is not None else 'unknown'
+        logger.info(
+            f"Progress: {status['pages_done']}/{status['pages_total']} pages ({status['percent']:.1f}%), "
+            f"{status['listings']} listings, {status['listings_per_s']:.1f} listings/s, "
+            f"{status['phones_pending']} phones pending, {status['error_rate']:.1%} errors, ETA {eta}"
+        )
+
+    async def run(self):
+        """Report every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            status = self.status()
+            self.write(status)
+            if time.time() - self.last_logged >= self.log_interval:
+                self.last_logged = time.time()
+                self.log(status)
+
+    def finish(self, state):
+        """Final status once the crawl has ended ('finished' or 'failed')"""
+        status = self.status(state)
+        self.write(status)
+        return status
@@ -0,0 +1,80 @@
+import asyncio
+import random
+import time
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying; anything else (404, 410, ...) is final
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), None if absent/invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RetryPolicy:
+    """Jittered exponential backoff that honours Retry-After"""
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry number `attempt` (0-based)"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        # Full jitter keeps retries from many workers from arriving together
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class AdaptiveConcurrency:
+    """AIMD concurrency limit: grows while responses are fast and healthy, halves when they degrade"""
+
+    def __init__(self, initial, minimum=1, maximum=None, latency_target=5.0, cooldown=2.0):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.latency_target = latency_target
+        # Only one decrease per cooldown, so a burst of failures does not collapse the limit
+        self.cooldown = cooldown
+        self.last_decrease = 0.0
+        self.active = 0
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        async with self.condition:
+            self.active -= 1
+            # Wake as many waiters as there are free slots, which covers a raised limit
+            self.condition.notify(max(1, int(self.limit) - self.active))
+
+    def record(self, success, latency=None):
+        """Feed back the outcome of one request"""
+        if success and (latency is None or latency <= self.latency_target):
+            # Additive increase: about +1 after a full window of good responses
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            return
+
+        now = time.monotonic()
+        if now - self.last_decrease >= self.cooldown:
+            self.last_decrease = now
+            self.limit = max(self.minimum, self.limit / 2)
+            logger.info(f"Backing off: concurrency limit now {int(self.limit)}")
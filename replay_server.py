@@ -0,0 +1,152 @@
+import asyncio
+import random
+import logging
+from aiohttp import web
+
+from page_cache import PageCache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SOURCE_BASE_URL = "https://binalar.az"
+EMPTY_PAGE = '<html><head><meta charset="utf-8"></head><body><div class="row"></div></body></html>'
+
+# Value pools for synthetic listings, shaped like the real catalog
+CITIES = [('Bakı', ['Nəsimi r.', 'Yasamal r.', 'Sabunçu r.', 'Xətai r.', 'Binəqədi r.']),
+          ('Sumqayıt', ['Sumqayıt']), ('Abşeron', ['Masazır q.', 'Mehdiabad q.']),
+          ('Xırdalan', ['Xırdalan']), ('Gəncə', ['Kəpəz r.'])]
+PROPERTY_TYPES = ['Həyət evi - Villa', 'Yeni tikili', 'Köhnə tikili', 'Torpaq', 'Obyekt - Ofis']
+
+def synthetic_card(listing_id):
+    """HTML for one listing card, deterministic in listing_id"""
+    rng = random.Random(listing_id)
+    city, regions = rng.choice(CITIES)
+    region = rng.choice(regions)
+    property_type = rng.choice(PROPERTY_TYPES)
+    rooms = rng.randint(1, 6)
+    visible_phone = ''
+    if rng.random() < 0.1:
+        visible_phone = f'<span class="text-success">(050) {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}</span>'
+    return f'''<div class="card style-6 prop_item">
+<a href="/{rooms}-otaqli-menzil-satilir-{listing_id}"><img src="/img/{listing_id}.jpg" alt=""></a>
+<div class="card-body">
+<span class="text-primary fw-bold">{rng.randint(20, 900) * 1000:,} AZN</span>
+<b class="prop_title">{city} / {region} / {property_type}</b>
+<ul class="d-flex">
+<li class="d-flex align-items-center flex-fill"><i class="icon-room"></i> {rooms} otaq</li>
+<li class="d-flex align-items-center flex-fill"><i class="icon-area"></i> {rng.randint(30, 400)} m²</li>
+<li class="d-flex align-items-center flex-fill"><i class="icon-floor"></i> {rng.randint(1, 9)}/{rng.randint(9, 20)} mərtəbə</li>
+</ul>
+<p class="short_info">Təmirli, əşyalı, sənədli {property_type.lower()} {listing_id}</p>
+<div class="row"><div class="col">{city}</div><div class="col-auto text-end text-body-tertiary">{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2025</div></div>
+<p class="text-body-tertiary mb-0 address"><span>Ünvan</span> {region}, küçə {rng.randint(1, 200)}</p>
+<div class="phone_btn btn btn-success" rel="{listing_id}">Nömrəni göstər</div>{visible_phone}
+</div>
+</div>'''
+
+def synthetic_page(offset, page_size=32, first_id=500000):
+    """A listing page for ?page=offset with ids counting down from first_id"""
+    cards = ''.join(synthetic_card(first_id - offset - k) for k in range(page_size))
+    return f'<html><head><meta charset="utf-8"></head><body><div class="row">{cards}</div></body></html>'
+
+def create_app(page_cache_dir=None, synthetic_pages=0, latency=0.0, error_rate=0.0,
+               rate_limit_rate=0.0, retry_after=1, source_base_url=SOURCE_BASE_URL, seed=None):
+    """Stand-in for binalar.az serving recorded or synthetic pages and a fake phone endpoint"""
+    rng = random.Random(seed)
+    page_cache = PageCache(page_cache_dir) if page_cache_dir else None
+    stats = {'pages': 0, 'phones': 0, 'errors': 0, 'rate_limited': 0}
+
+    async def misbehave():
+        """Apply configured latency and return an injected error response, if any"""
+        if latency:
+            await asyncio.sleep(latency * rng.uniform(0.5, 1.5))
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            stats['rate_limited'] += 1
+            return web.Response(status=429, headers={'Retry-After': str(retry_after)})
+        if roll < rate_limit_rate + error_rate:
+            stats['errors'] += 1
+            return web.Response(status=503)
+        return None
+
+    async def listing_page(request):
+        failure = await misbehave()
+        if failure is not None:
+            return failure
+        stats['pages'] += 1
+
+        offset = int(request.query.get('page', 0))
+        if page_cache:
+            # The scraper requests the first page without a trailing slash
+            key = source_base_url if request.path_qs == '/' else f"{source_base_url}{request.path_qs}"
+            body = page_cache.load(key) or EMPTY_PAGE
+        elif offset // 32 < synthetic_pages:
+            body = synthetic_page(offset)
+        else:
+            body = EMPTY_PAGE
+        return web.Response(text=body, content_type='text/html')
+
+    async def get_phone(request):
+        failure = await misbehave()
+        if failure is not None:
+            return failure
+        stats['phones'] += 1
+
+        data = await request.post()
+        listing_id = int(data.get('id', 0))
+        digits = f"{listing_id % 10000000:07d}"
+        return web.Response(
+            text=f'<a href="tel:+99450{digits}">(050) {digits[:3]}-{digits[3:5]}-{digits[5:]}</a>',
+            content_type='text/html'
+        )
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    async def close_cache(app):
+        if page_cache:
+            page_cache.close()
+
+    app = web.Application()
+    app['stats'] = stats
+    app.router.add_get('/', listing_page)
+    app.router.add_post('/binalar/get_phone/', get_phone)
+    app.router.add_get('/_stats', get_stats)
+    app.on_cleanup.append(close_cache)
+    return app
+
+async def start_server(app, host='127.0.0.1', port=0):
+    """Start the app in the running loop; returns (runner, base_url)"""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}"
+
+def main():
+    """Run the stand-in server from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in for binalar.az to replay crawls offline')
+    parser.add_argument('--page-cache', type=str, default=None, help='Page cache directory recorded with main.py --page-cache')
+    parser.add_argument('--source-base-url', type=str, default=SOURCE_BASE_URL, help=f'Base URL the page cache was recorded from (default: {SOURCE_BASE_URL})')
+    parser.add_argument('--synthetic-pages', type=int, default=100, help='Synthetic pages to serve when no page cache is given (default: 100)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean response latency in seconds (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503 (default: 0)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with 429 (default: 0)')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429 responses (default: 1)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to bind (default: 8080)')
+
+    args = parser.parse_args()
+
+    app = create_app(page_cache_dir=args.page_cache, synthetic_pages=args.synthetic_pages,
+                     latency=args.latency, error_rate=args.error_rate,
+                     rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+                     source_base_url=args.source_base_url.rstrip('/'))
+    logger.info(f"Serving on http://{args.host}:{args.port} (use main.py --base-url)")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
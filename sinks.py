@@ -0,0 +1,225 @@
+import csv
+import logging
+import os
+from datetime import date, datetime
+
+import xlsxwriter
+
+from listing import DATE_FORMAT, split_title
+
+logger = logging.getLogger(__name__)
+
+FIELDNAMES = ['phone', 'id', 'title', 'price', 'price_raw', 'rooms', 'area', 'floor',
+              'description', 'date', 'address', 'visible_phone', 'phone_id', 'url']
+
+class CsvSink:
+    """Append listings to a CSV file as they arrive, flushing every `flush_every` rows
+
+    Rows go to `tmp_filename` (default: <filename>.tmp), which replaces the
+    file only on close(), so a failed run leaves the previous output alone.
+    """
+
+    def __init__(self, filename, fieldnames=FIELDNAMES, flush_every=500, tmp_filename=None):
+        self.filename = filename
+        self.tmp_filename = tmp_filename or f"{filename}.tmp"
+        self.fieldnames = fieldnames
+        self.flush_every = flush_every
+        self.rows = 0
+        self.file = open(self.tmp_filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, listing):
+        self.writer.writerow(listing.to_row(self.fieldnames))
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+            os.replace(self.tmp_filename, self.filename)
+            logger.info(f"Data saved to {self.filename} ({self.rows} rows)")
+
+    def abort(self):
+        """Close and discard the rows written so far"""
+        if self.file:
+            self.file.close()
+            self.file = None
+            os.remove(self.tmp_filename)
+
+class XlsxSink:
+    """Stream listings into an XLSX sheet with xlsxwriter's constant-memory mode
+
+    Like CsvSink, the workbook is written to <filename>.tmp and only
+    replaces the file on close().
+    """
+
+    def __init__(self, filename, fieldnames=FIELDNAMES, sheet_name='Listings'):
+        self.filename = filename
+        self.tmp_filename = f"{filename}.tmp"
+        self.fieldnames = fieldnames
+        self.rows = 0
+        # constant_memory writes each row out as soon as the next one starts;
+        # URLs stay plain strings because a sheet only holds 65,530 hyperlinks
+        self.workbook = xlsxwriter.Workbook(self.tmp_filename, {'constant_memory': True, 'strings_to_urls': False})
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+        self.worksheet.write_row(0, 0, fieldnames)
+
+    def write(self, listing):
+        self.rows += 1
+        values = [listing.date_value() if field == 'date' else getattr(listing, field) for field in self.fieldnames]
+        # Dates stay in the site's text format; numbers go in as numeric cells
+        self.worksheet.write_row(self.rows, 0, [value.strftime(DATE_FORMAT) if isinstance(value, date) else value
+                                                for value in values])
+
+    def close(self):
+        if self.workbook:
+            self.workbook.close()
+            self.workbook = None
+            os.replace(self.tmp_filename, self.filename)
+            logger.info(f"Data saved to {self.filename} ({self.rows} rows)")
+
+    def abort(self):
+        """Close and discard the rows written so far"""
+        if self.workbook:
+            self.workbook.close()
+            self.workbook = None
+            if os.path.exists(self.tmp_filename):
+                os.remove(self.tmp_filename)
+
+class ParquetSink:
+    """Write typed listings to a Parquet dataset partitioned by scrape date
+
+    Files land in <root>/scrape_date=YYYY-MM-DD/, so pyarrow/pandas read the
+    partition column back without scanning file contents.
+
+    Each run writes one part file under a dot-prefixed temporary name, which
+    dataset readers skip, and renames it into place on close(); abort()
+    deletes it. With `replace_partition` (a complete crawl), close() also
+    removes the part files earlier runs wrote for the same date, so the
+    partition holds one snapshot. Otherwise the new part file is added next
+    to them, and readers deduplicate by id.
+    """
+
+    def __init__(self, root, batch_size=5000, scrape_date=None, replace_partition=False):
+        # Imported here so pyarrow is only needed when Parquet output is requested
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.root = root
+        self.batch_size = batch_size
+        self.replace_partition = replace_partition
+        self.rows = 0
+        self.buffer = []
+
+        category = pa.dictionary(pa.int32(), pa.string())
+        self.schema = pa.schema([
+            ('id', pa.int64()),
+            ('phone', pa.string()),
+            ('title', pa.string()),
+            ('city', category),
+            ('region', category),
+            ('property_type', category),
+            ('price', pa.int64()),
+            ('price_raw', pa.string()),
+            ('rooms', pa.int16()),
+            ('area', pa.float32()),
+            ('floor', pa.string()),
+            ('description', pa.string()),
+            ('date', pa.date32()),
+            ('date_raw', pa.string()),
+            ('address', pa.string()),
+            ('visible_phone', pa.string()),
+            ('phone_id', pa.string()),
+            ('url', pa.string()),
+        ])
+
+        scrape_date = scrape_date or date.today()
+        directory = os.path.join(root, f"scrape_date={scrape_date.isoformat()}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        name = f"part-{datetime.now():%H%M%S}-{os.getpid()}.parquet"
+        self.filename = os.path.join(directory, name)
+        self.tmp_filename = os.path.join(directory, f".{name}.tmp")
+        self.writer = pq.ParquetWriter(self.tmp_filename, self.schema, compression='zstd')
+
+    def write(self, listing):
+        self.buffer.append(listing)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Convert buffered listings into one typed row group"""
+        if not self.buffer:
+            return
+        pa = self.pa
+        rows = self.buffer
+        self.buffer = []
+
+        titles = [split_title(listing.title) for listing in rows]
+        columns = {
+            'city': [parts[0] for parts in titles],
+            'region': [parts[1] for parts in titles],
+            'property_type': [parts[2] for parts in titles],
+            # int16 column: a mistyped room count must not abort the whole batch
+            'rooms': [listing.rooms if listing.rooms is not None and listing.rooms < 2 ** 15 else None
+                      for listing in rows],
+        }
+        arrays = []
+        for field in self.schema:
+            if field.name in columns:
+                values = columns[field.name]
+            elif pa.types.is_string(field.type):
+                values = [getattr(listing, field.name) or None for listing in rows]
+            else:
+                values = [getattr(listing, field.name) for listing in rows]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self):
+        if self.writer:
+            self.flush()
+            self.writer.close()
+            self.writer = None
+            os.replace(self.tmp_filename, self.filename)
+            if self.replace_partition:
+                for name in os.listdir(self.directory):
+                    path = os.path.join(self.directory, name)
+                    if name.startswith('part-') and name.endswith('.parquet') and path != self.filename:
+                        os.remove(path)
+                        logger.info(f"Replaced {path}")
+            logger.info(f"Data saved to {self.filename} ({self.rows} rows)")
+
+    def abort(self):
+        """Close and discard the rows written so far"""
+        if self.writer:
+            self.buffer = []
+            self.writer.close()
+            self.writer = None
+            os.remove(self.tmp_filename)
+
+class MultiSink:
+    """Fan each listing out to several sinks"""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def write(self, listing):
+        for sink in self.sinks:
+            sink.write(listing)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def abort(self):
+        """Discard the output of sinks that support it and close the others"""
+        for sink in self.sinks:
+            getattr(sink, 'abort', sink.close)()
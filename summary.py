@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+from cleaning import CHUNKSIZE, iter_clean_listings
+
+# Value counts kept for the explore scripts, keyed by the columns they group by
+COUNTED_COLUMNS = [
+    ('city',),
+    ('property_type',),
+    ('rooms_clean',),
+    ('year_month',),
+    ('city', 'region'),
+    ('city', 'property_type'),
+    ('city', 'rooms_clean'),
+    ('property_type', 'area_clean'),
+]
+# Numeric columns summarized like Series.describe(). Quantiles come from
+# value counts, rounded to this many decimals to keep the number of distinct
+# values small; count, mean, std, min and max are exact.
+DESCRIBED_COLUMNS = {'price_clean': 0, 'area_clean': 1, 'price_per_sqm': 0}
+
+def count_rows(df, columns):
+    """Row counts per distinct value of `columns` as a DataFrame with a 'count' column, missing values left out"""
+    keys = pd.DataFrame({column: df[column].astype(object) if isinstance(df[column].dtype, pd.CategoricalDtype)
+                         else df[column] for column in columns})
+    return keys.groupby(list(columns)).size().rename('count').reset_index()
+
+def combine_counts(tables, columns):
+    """Sum the counts of several count_rows() tables"""
+    return pd.concat(tables, ignore_index=True).groupby(list(columns), as_index=False)['count'].sum()
+
+def weighted_quantile(values, weights, q):
+    """Quantile of values repeated `weights` times, interpolated linearly like Series.quantile"""
+    order = np.argsort(values)
+    values = np.asarray(values, dtype=float)[order]
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    if not len(values):
+        return np.nan
+    position = q * (cumulative[-1] - 1)
+    lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+    upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+    return lower + (upper - lower) * (position - np.floor(position))
+
+class ListingSummary:
+    """Metrics printed by the explore scripts, combined from partial aggregates of each chunk
+
+    Every metric is a sum of per-chunk parts (value counts, null counts and
+    count/mean/M2 moments), so memory is bounded by the chunk size and the
+    number of distinct values rather than by the number of rows.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.dtypes = None
+        self.null_counts = None
+        self.counts = {columns: [] for columns in COUNTED_COLUMNS}
+        self.moments = {column: (0, 0.0, 0.0, np.inf, -np.inf) for column in DESCRIBED_COLUMNS}
+        self.values = {column: [] for column in DESCRIBED_COLUMNS}
+        self.date_min = pd.NaT
+        self.date_max = pd.NaT
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        summary = cls()
+        for chunk in chunks:
+            summary.add(chunk)
+        return summary
+
+    @classmethod
+    def from_csv(cls, path='binalar_listings_clean.csv', chunksize=CHUNKSIZE):
+        """Summarize a clean CSV, reading `chunksize` rows at a time"""
+        return cls.from_chunks(iter_clean_listings(path, chunksize))
+
+    def add(self, chunk):
+        """Fold one chunk of clean listings into the summary"""
+        self.total += len(chunk)
+        if self.dtypes is None:
+            self.dtypes = chunk.dtypes
+            self.null_counts = chunk.isnull().sum()
+        else:
+            self.null_counts = self.null_counts.add(chunk.isnull().sum(), fill_value=0).astype('int64')
+
+        for columns, tables in self.counts.items():
+            tables.append(count_rows(chunk, columns))
+            # Compact as we go so the tables stay at the number of distinct values
+            self.counts[columns] = [combine_counts(tables, columns)]
+
+        for column, decimals in DESCRIBED_COLUMNS.items():
+            values = chunk[column].dropna().to_numpy(dtype=float)
+            if len(values):
+                mean = values.mean()
+                self.moments[column] = _merge_moments(self.moments[column], (
+                    len(values), mean, ((values - mean) ** 2).sum(), values.min(), values.max()))
+            rounded = pd.DataFrame({column: np.round(values, decimals)})
+            self.values[column].append(count_rows(rounded, (column,)))
+            self.values[column] = [combine_counts(self.values[column], (column,))]
+
+        dates = chunk['date_parsed']
+        self.date_min = min(filter(pd.notna, [self.date_min, dates.min()]), default=pd.NaT)
+        self.date_max = max(filter(pd.notna, [self.date_max, dates.max()]), default=pd.NaT)
+
+    def notna(self, column):
+        return self.total - int(self.null_counts[column])
+
+    def value_counts(self, *columns, **filters):
+        """Like df[filtered rows][columns].value_counts(), largest first
+
+        `columns` plus the filtered columns must be one of COUNTED_COLUMNS,
+        with the filtered columns first.
+        """
+        key = tuple(filters) + columns
+        table = self.counts[key][0]
+        for column, value in filters.items():
+            table = table[table[column] == value]
+        counts = table.set_index(list(columns))['count']
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def stats_by(self, group, column):
+        """count, mean, median, min and max of `column` per value of `group`"""
+        table = self.counts[(group, column)][0]
+        rows = {}
+        for value, part in table.groupby(group):
+            values, weights = part[column].to_numpy(dtype=float), part['count'].to_numpy()
+            rows[value] = {
+                'count': weights.sum(),
+                'mean': (values * weights).sum() / weights.sum(),
+                'median': weighted_quantile(values, weights, 0.5),
+                'min': values.min(),
+                'max': values.max(),
+            }
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis(group)
+
+    def describe(self, column):
+        """Like df[column].describe() for a numeric column"""
+        count, mean, m2, low, high = self.moments[column]
+        table = self.values[column][0]
+        values, weights = table[column].to_numpy(dtype=float), table['count'].to_numpy()
+        stats = {
+            'count': float(count),
+            'mean': mean if count else np.nan,
+            'std': np.sqrt(m2 / (count - 1)) if count > 1 else np.nan,
+            'min': low if count else np.nan,
+        }
+        for q in (0.25, 0.5, 0.75):
+            stats[f"{q:.0%}"] = weighted_quantile(values, weights, q)
+        stats['max'] = high if count else np.nan
+        return pd.Series(stats, name=column)
+
+def _merge_moments(a, b):
+    """Combine (count, mean, M2, min, max) of two parts (Chan et al.)"""
+    count_a, mean_a, m2_a, min_a, max_a = a
+    count_b, mean_b, m2_b, min_b, max_b = b
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta ** 2 * count_a * count_b / count
+    return count, mean, m2, min(min_a, min_b), max(max_a, max_b)
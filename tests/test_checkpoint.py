@@ -0,0 +1,32 @@
+"""Resuming a checkpoint journal after a crash keeps every record written afterwards"""
+from checkpoint import CheckpointJournal
+
+def test_resume_after_partial_line(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    journal = CheckpointJournal(str(path))
+    journal.open()
+    journal.record_page('https://binalar.az', [{'id': 1}])
+    journal.record_phone(1, '(050) 123-45-67')
+    journal.close()
+    # A crash in the middle of a write
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "phone", "id": 2, "ph')
+
+    journal = CheckpointJournal(str(path))
+    journal.open(resume=True)
+    journal.record_page('https://binalar.az/?page=32', [{'id': 2}])
+    journal.close()
+
+    done_pages, pages, phones = CheckpointJournal(str(path)).load()
+    assert done_pages == {'https://binalar.az', 'https://binalar.az/?page=32'}
+    assert pages == [[{'id': 1}], [{'id': 2}]]
+    assert phones == {1: '(050) 123-45-67'}
+
+def test_resume_without_newline_at_all(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    path.write_text('{"type": "pa')
+    journal = CheckpointJournal(str(path))
+    journal.open(resume=True)
+    journal.record_phone(3, None)
+    journal.close()
+    assert CheckpointJournal(str(path)).load()[2] == {3: None}
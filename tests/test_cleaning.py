@@ -0,0 +1,113 @@
+"""update_clean_listings keeps the clean CSV equal to cleaning the raw CSV from scratch"""
+import csv
+import os
+
+import pandas as pd
+import pytest
+
+from cleaning import clean_listings, update_clean_listings
+
+FIELDNAMES = ['phone', 'id', 'title', 'price', 'price_raw', 'rooms', 'area', 'floor',
+              'description', 'date', 'address', 'visible_phone', 'phone_id', 'url']
+TITLES = ['Bakı / Nəsimi r. / Yeni tikili', 'Bakı / Yasamal r. / Köhnə tikili', 'Sumqayıt / Torpaq']
+
+def raw_row(listing_id, price=None):
+    price = price if price is not None else 50000 + listing_id * 1000
+    return {'phone': f'(050) 123-45-{listing_id % 100:02d}', 'id': str(listing_id),
+            'title': TITLES[listing_id % len(TITLES)], 'price': str(price), 'price_raw': f'{price:,} AZN',
+            'rooms': str(1 + listing_id % 5), 'area': str(40 + listing_id), 'floor': '3/9',
+            'description': f'Listing {listing_id}', 'date': f'{1 + listing_id % 28:02d}.03.2025',
+            'address': 'küçə 1', 'visible_phone': '', 'phone_id': str(listing_id),
+            'url': f'https://binalar.az/menzil-{listing_id}'}
+
+def write_raw(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def read_sorted(path):
+    return pd.read_csv(path, dtype=str).sort_values('id', key=lambda ids: ids.astype(int)).reset_index(drop=True)
+
+def assert_matches_full_clean(raw_path, clean_path):
+    expected = clean_listings(pd.read_csv(raw_path, dtype=str))
+    expected_path = f"{clean_path}.expected"
+    expected.to_csv(expected_path, index=False)
+    pd.testing.assert_frame_equal(read_sorted(clean_path), read_sorted(expected_path))
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'raw.csv'), str(tmp_path / 'clean.csv')
+
+def test_first_run_cleans_everything(paths):
+    raw, clean = paths
+    write_raw(raw, [raw_row(n) for n in range(1, 11)])
+    counts = update_clean_listings(raw, clean, chunksize=4)
+    assert counts['added'] == 10 and counts['updated'] == counts['removed'] == 0
+    assert_matches_full_clean(raw, clean)
+
+def test_unchanged_file_is_skipped(paths):
+    raw, clean = paths
+    write_raw(raw, [raw_row(n) for n in range(1, 11)])
+    update_clean_listings(raw, clean)
+    before = os.path.getmtime(clean)
+    counts = update_clean_listings(raw, clean)
+    assert counts['skipped_files'] == 1 and counts['added'] == 0
+    assert os.path.getmtime(clean) == before
+
+def test_added_changed_and_removed_listings(paths):
+    raw, clean = paths
+    write_raw(raw, [raw_row(n) for n in range(1, 11)])
+    update_clean_listings(raw, clean, chunksize=3)
+
+    # Newest first, as merge_into_csv writes it: two new, one re-priced, one gone
+    rows = [raw_row(12), raw_row(11), raw_row(5, price=1)] + [raw_row(n) for n in range(1, 11) if n not in (5, 7)]
+    write_raw(raw, rows)
+    counts = update_clean_listings(raw, clean, chunksize=3)
+    assert (counts['added'], counts['updated'], counts['removed'], counts['unchanged']) == (2, 1, 1, 8)
+    assert_matches_full_clean(raw, clean)
+
+def test_only_new_listings_are_appended(paths):
+    raw, clean = paths
+    write_raw(raw, [raw_row(n) for n in range(1, 6)])
+    update_clean_listings(raw, clean)
+    write_raw(raw, [raw_row(n) for n in range(1, 9)])
+    counts = update_clean_listings(raw, clean)
+    assert (counts['added'], counts['updated'], counts['removed']) == (3, 0, 0)
+    assert_matches_full_clean(raw, clean)
+
+def test_duplicate_ids_keep_the_first_row(paths):
+    raw, clean = paths
+    write_raw(raw, [raw_row(3, price=99), raw_row(1), raw_row(2), raw_row(3)])
+    update_clean_listings(raw, clean, chunksize=2)
+    df = read_sorted(clean)
+    assert list(df['id']) == ['1', '2', '3']
+    assert df.loc[2, 'price'] == '99'
+
+@pytest.mark.parametrize('chunksize', [1, 4, 1000])
+def test_result_does_not_depend_on_chunksize(tmp_path, chunksize):
+    raw, clean = str(tmp_path / 'raw.csv'), str(tmp_path / 'clean.csv')
+    write_raw(raw, [raw_row(n) for n in range(1, 21)])
+    update_clean_listings(raw, clean, chunksize=chunksize)
+    write_raw(raw, [raw_row(n, price=7 if n % 4 == 0 else None) for n in range(3, 25)])
+    update_clean_listings(raw, clean, chunksize=chunksize)
+    assert_matches_full_clean(raw, clean)
+
+def test_missing_state_rebuilds(paths):
+    raw, clean = paths
+    write_raw(raw, [raw_row(n) for n in range(1, 11)])
+    update_clean_listings(raw, clean)
+    os.remove(f"{clean}.state.sqlite")
+    counts = update_clean_listings(raw, clean)
+    assert counts['added'] == 10 and counts['skipped_files'] == 0
+    assert_matches_full_clean(raw, clean)
+
+def test_clean_csv_edited_behind_its_back_is_rebuilt(paths):
+    raw, clean = paths
+    write_raw(raw, [raw_row(n) for n in range(1, 11)])
+    update_clean_listings(raw, clean)
+    with open(clean, 'a', encoding='utf-8') as f:
+        f.write('stray line\n')
+    counts = update_clean_listings(raw, clean)
+    assert counts['added'] == 10
+    assert_matches_full_clean(raw, clean)
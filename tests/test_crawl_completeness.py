@@ -0,0 +1,44 @@
+"""A crawl only counts as complete when no page was lost and it reached the end of the catalog"""
+import asyncio
+
+from main import BinalarScraper, parse_listings_from_page
+from replay_server import create_app, start_server
+
+def test_empty_run_before_discovered_end_stops_short():
+    scraper = BinalarScraper(stop_after_empty_pages=3)
+    scraper.stop_crawl = asyncio.Event()
+    scraper.last_listing_page = 10
+    for page_number in (4, 5, 6):
+        scraper._note_empty(page_number)
+    assert scraper.stop_crawl.is_set()
+    assert scraper.stopped_short
+
+def test_empty_run_after_discovered_end_is_the_catalog_end():
+    scraper = BinalarScraper(stop_after_empty_pages=3)
+    scraper.stop_crawl = asyncio.Event()
+    scraper.last_listing_page = 10
+    for page_number in (11, 12, 13):
+        scraper._note_empty(page_number)
+    assert scraper.stop_crawl.is_set()
+    assert not scraper.stopped_short
+
+def test_parse_failures_count_as_failed_pages(tmp_path):
+    def flaky_parser(html_content, base_url):
+        if 'satilir-499968"' in html_content:
+            raise RuntimeError('worker died')
+        return parse_listings_from_page(html_content, base_url)
+
+    async def run():
+        runner, base_url = await start_server(create_app(synthetic_pages=3))
+        try:
+            async with BinalarScraper(delay=0, base_url=base_url, phone_rate=0,
+                                      checkpoint_path=str(tmp_path / 'checkpoint.jsonl')) as scraper:
+                scraper.parse_func = flaky_parser
+                await scraper.scrape_listings(max_pages=3)
+                return scraper
+        finally:
+            await runner.cleanup()
+
+    scraper = asyncio.run(run())
+    assert scraper.listings_count == 64
+    assert scraper.metrics.pages_failed.snapshot() == {'stage=parse': 1}
@@ -0,0 +1,47 @@
+"""Listing records keep their typed fields and the site's text through every format"""
+from datetime import date
+
+from listing import Listing
+from listing_store import ListingStore, read_listings
+
+def test_fields_are_typed():
+    listing = Listing.from_dict({'id': '7', 'price': '120000', 'rooms': '3', 'area': '85.5', 'date': '05.03.2025'})
+    assert (listing.id, listing.price, listing.rooms, listing.area) == (7, 120000, 3, 85.5)
+    assert listing.date == date(2025, 3, 5)
+    assert listing.date_raw is None
+    assert listing.to_row(['date', 'area'])['date'] == '05.03.2025'
+
+def test_unparsed_date_text_is_kept():
+    listing = Listing.from_dict({'id': '7', 'date': 'Bugün, 14:30'})
+    assert listing.date is None
+    assert listing.date_raw == 'Bugün, 14:30'
+    assert listing.to_row(['id', 'date']) == {'id': 7, 'date': 'Bugün, 14:30'}
+    # Through a journal/cache entry and through a CSV row
+    assert Listing.from_dict(listing.to_dict()) == listing
+    assert Listing.from_dict(listing.to_row(['id', 'date'])) == listing
+
+def test_store_keeps_unparsed_date_text(tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    store = ListingStore(path)
+    store.write(Listing.from_dict({'id': '1', 'date': '05.03.2025'}))
+    store.write(Listing.from_dict({'id': '2', 'date': 'Bugün, 14:30'}))
+    store.close()
+    df = read_listings(path, columns='id, date, date_raw').set_index('id')
+    assert df.loc[1, 'date'].date() == date(2025, 3, 5)
+    assert df.loc[2, 'date_raw'] == 'Bugün, 14:30'
+
+def test_stores_without_date_raw_can_be_read(tmp_path):
+    import sqlite3
+
+    from cleaning import iter_store_listings
+    from listing_store import SCHEMA
+
+    path = str(tmp_path / 'old.sqlite')
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA.replace('    date_raw TEXT,\n', ''))
+        conn.execute("INSERT INTO listings (id, title, date, first_seen, last_seen) "
+                     "VALUES (1, 'Bakı / Nəsimi r. / Ofis', '2025-02-01', '2025-02-02', '2025-02-02')")
+    conn.close()
+    chunk, = iter_store_listings(path)
+    assert chunk.loc[0, 'date'] == '01.02.2025'
+    assert chunk.loc[0, 'city'] == 'Bakı'
@@ -0,0 +1,17 @@
+"""Parsed listings in the page cache are only reused by the parser that produced them"""
+from page_cache import PageCache
+
+BODY = '<html><body></body></html>'
+LISTINGS = [{'id': 1, 'url': 'https://binalar.az/menzil-1'}]
+
+def test_listings_are_keyed_by_parser(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.store_listings(BODY, 'bs4', 1, 'https://binalar.az', LISTINGS)
+
+    assert cache.cached_listings(BODY, 'bs4', 1, 'https://binalar.az') == LISTINGS
+    assert cache.cached_listings(BODY, 'lxml', 1, 'https://binalar.az') is None
+    assert cache.cached_listings(BODY, 'bs4', 2, 'https://binalar.az') is None
+    assert cache.cached_listings(BODY, 'bs4', 1, 'http://127.0.0.1:8080') is None
+    assert cache.cached_listings(BODY + ' ', 'bs4', 1, 'https://binalar.az') is None
+    assert cache.parse_hits == 1
+    cache.close()
@@ -0,0 +1,41 @@
+"""The bs4 and lxml parser backends must turn recorded pages into the same listings"""
+from pathlib import Path
+
+import pytest
+
+from main import parse_listings_from_page, parse_listings_from_page_lxml
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+BASE_URL = 'https://binalar.az'
+
+def parse_both(html_content):
+    return ([listing.to_dict() for listing in parse_listings_from_page(html_content, BASE_URL)],
+            [listing.to_dict() for listing in parse_listings_from_page_lxml(html_content, BASE_URL)])
+
+@pytest.mark.parametrize('page', sorted(path.name for path in FIXTURES.glob('*.html')))
+@pytest.mark.parametrize('as_bytes', [False, True], ids=['str', 'bytes'])
+def test_backends_agree(page, as_bytes):
+    html_content = (FIXTURES / page).read_bytes()
+    if not as_bytes:
+        html_content = html_content.decode('utf-8')
+    from_bs4, from_lxml = parse_both(html_content)
+    assert from_lxml == from_bs4
+
+def test_listing_page_is_parsed():
+    from_bs4, _ = parse_both((FIXTURES / 'listing_page.html').read_text(encoding='utf-8'))
+    assert len(from_bs4) == 32
+    assert all(listing['url'].startswith(f"{BASE_URL}/") for listing in from_bs4)
+
+def test_edge_cases():
+    from_bs4, _ = parse_both((FIXTURES / 'edge_cases_page.html').read_text(encoding='utf-8'))
+    # The card without a link and the non-listing card are left out
+    assert [listing['id'] for listing in from_bs4] == [412345, 412344, 412343]
+    first = from_bs4[0]
+    assert first['title'] == 'Bakı /Nəsimi r./ Yeni tikili'
+    assert first['description'] == 'Təmirli & əşyalıkupçavar'
+    assert first['visible_phone'] == '(055) 444-12-34'
+    assert from_bs4[1]['date'] is None and from_bs4[1]['date_raw'] == 'Bugün, 14:30'
+    assert from_bs4[2]['visible_phone'] is None
+
+def test_empty_input():
+    assert parse_both('') == ([], [])
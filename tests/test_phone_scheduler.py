@@ -0,0 +1,26 @@
+"""The phone scheduler tells failed requests apart from responses without a phone"""
+import asyncio
+
+import pytest
+
+from phone_scheduler import PhoneLookupError, PhoneScheduler
+
+async def lookup(listing_id):
+    if listing_id == 1:
+        return '(050) 123-45-67'
+    if listing_id == 2:
+        return None
+    raise TimeoutError()
+
+def test_outcomes_are_counted_separately():
+    async def run():
+        scheduler = PhoneScheduler(lookup, rate=0)
+        assert await scheduler.resolve(1) == '(050) 123-45-67'
+        assert await scheduler.resolve(2) is None
+        with pytest.raises(PhoneLookupError):
+            await scheduler.resolve(3)
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert (stats['succeeded'], stats['no_phone'], stats['failed']) == (1, 1, 1)
+    assert stats['in_flight'] == stats['active'] == 0
@@ -0,0 +1,68 @@
+"""File sinks only replace the previous output when they are closed cleanly"""
+import os
+
+import pytest
+
+from listing import Listing
+from main import BinalarScraper
+from sinks import CsvSink, MultiSink, XlsxSink
+
+LISTING = Listing.from_dict({'id': '1', 'url': 'https://binalar.az/menzil-1', 'price': '90000',
+                             'date': '05.03.2025'})
+
+@pytest.mark.parametrize('sink_class, name', [(CsvSink, 'out.csv'), (XlsxSink, 'out.xlsx')])
+def test_close_replaces_previous_output(tmp_path, sink_class, name):
+    path = tmp_path / name
+    path.write_bytes(b'previous')
+    sink = sink_class(str(path))
+    sink.write(LISTING)
+    assert path.read_bytes() == b'previous'
+    sink.close()
+    assert path.read_bytes() != b'previous'
+    assert [p.name for p in tmp_path.iterdir()] == [name]
+
+@pytest.mark.parametrize('sink_class, name', [(CsvSink, 'out.csv'), (XlsxSink, 'out.xlsx')])
+def test_abort_keeps_previous_output(tmp_path, sink_class, name):
+    path = tmp_path / name
+    path.write_bytes(b'previous')
+    sink = MultiSink([sink_class(str(path))])
+    sink.write(LISTING)
+    sink.abort()
+    assert path.read_bytes() == b'previous'
+    assert [p.name for p in tmp_path.iterdir()] == [name]
+
+def test_csv_rows(tmp_path):
+    path = tmp_path / 'out.csv'
+    sink = CsvSink(str(path), fieldnames=['id', 'price', 'date', 'url'])
+    sink.write(LISTING)
+    sink.close()
+    assert path.read_text(encoding='utf-8').splitlines() == [
+        'id,price,date,url', '1,90000,05.03.2025,https://binalar.az/menzil-1']
+
+def test_save_without_data_leaves_file_alone(tmp_path):
+    path = tmp_path / 'out.csv'
+    path.write_text('previous')
+    scraper = BinalarScraper()
+    scraper.save_to_csv(str(path))
+    scraper.save_to_xlsx(str(tmp_path / 'out.xlsx'))
+    assert path.read_text() == 'previous'
+    assert [p.name for p in tmp_path.iterdir()] == ['out.csv']
+
+def test_parquet_part_file_appears_on_close_only(tmp_path):
+    pytest.importorskip('pyarrow')
+    from datetime import date
+
+    from sinks import ParquetSink
+
+    partition = tmp_path / 'scrape_date=2025-03-05'
+    aborted = ParquetSink(str(tmp_path), scrape_date=date(2025, 3, 5))
+    aborted.write(LISTING)
+    aborted.abort()
+    assert list(partition.iterdir()) == []
+
+    (partition / 'part-000000-1.parquet').write_bytes(b'earlier run')
+    sink = ParquetSink(str(tmp_path), scrape_date=date(2025, 3, 5), replace_partition=True)
+    sink.write(LISTING)
+    assert not any(p.name.startswith('part-') and p.name != 'part-000000-1.parquet' for p in partition.iterdir())
+    sink.close()
+    assert [p.name for p in partition.iterdir()] == [os.path.basename(sink.filename)]
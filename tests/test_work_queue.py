@@ -0,0 +1,39 @@
+"""Shard leases are renewed while a worker crawls and only the current holder can finish a shard"""
+import asyncio
+import time
+
+from crawl_coordinator import WorkQueue, keep_lease
+
+def lease_until(queue, shard_id):
+    return queue.conn.execute('SELECT lease_until FROM shards WHERE id = ?', (shard_id,)).fetchone()[0]
+
+def test_only_the_holder_completes_or_releases(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'), lease=-1)
+    queue.seed(total_pages=10, shard_pages=10)
+    shard_id = queue.claim('a')[0]
+    # The lease has run out, so the shard goes to the next worker
+    assert queue.claim('b')[0] == shard_id
+
+    queue.release(shard_id, 'a')
+    assert queue.progress() == {'claimed': 1}
+    assert not queue.complete(shard_id, 'a', 10, 'a.csv')
+    assert not queue.renew(shard_id, 'a')
+    assert queue.complete(shard_id, 'b', 10, 'b.csv')
+    assert queue.outputs() == ['b.csv']
+    queue.close()
+
+def test_lease_is_renewed_while_crawling(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'), lease=0.3)
+    queue.seed(total_pages=10, shard_pages=10)
+    shard_id = queue.claim('a')[0]
+    first_lease = lease_until(queue, shard_id)
+
+    async def crawl():
+        renewer = asyncio.create_task(keep_lease(queue, shard_id, 'a'))
+        await asyncio.sleep(0.5)
+        renewer.cancel()
+
+    asyncio.run(crawl())
+    assert lease_until(queue, shard_id) > first_lease
+    assert lease_until(queue, shard_id) > time.time()
+    queue.close()